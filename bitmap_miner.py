@@ -0,0 +1,94 @@
+# bitmap_miner.py
+import math
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# ---------- CONFIG ----------
+# Item columns unpacked to dense booleans at a time while building bitmaps
+PACK_CHUNK_COLUMNS = 256
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(a):
+        return _POPCOUNT_TABLE[a]
+
+
+def _to_csc(df):
+    """Boolean CSC matrix for a one-hot transactions DataFrame, dense or sparse-backed."""
+    if hasattr(df, "sparse"):
+        return df.sparse.to_coo().tocsc().astype(bool)
+    return sparse.csc_matrix(df.to_numpy(dtype=bool))
+
+
+def pack_bitmaps(matrix, columns):
+    """One packed transaction bitmap per column: (len(columns) x ceil(transactions / 8)) uint8."""
+    bitmaps = np.empty((len(columns), (matrix.shape[0] + 7) // 8), dtype=np.uint8)
+    for lo in range(0, len(columns), PACK_CHUNK_COLUMNS):
+        block = matrix[:, columns[lo:lo + PACK_CHUNK_COLUMNS]].toarray()
+        bitmaps[lo:lo + PACK_CHUNK_COLUMNS] = np.packbits(block, axis=0).T
+    return bitmaps
+
+
+def support_counts(bitmaps, prefix):
+    """Transactions containing both `prefix` and each row of `bitmaps`."""
+    return _popcount(bitmaps & prefix).sum(axis=1, dtype=np.int64)
+
+
+def eclat(df, min_support=0.5, use_colnames=False, max_len=None):
+    """
+    Frequent itemsets by Eclat over vertical bitmaps, with the same output as mlxtend's fpgrowth.
+
+    Each frequent item gets a packed bitmap of the transactions it occurs in. The search
+    extends a prefix with every later item at once: one bitwise AND of the prefix bitmap
+    against the candidates' bitmaps, then a popcount per row, gives all their supports.
+    """
+    matrix = _to_csc(df)
+    n = matrix.shape[0]
+    # Same threshold as mlxtend: at least ceil(min_support * n) transactions
+    min_count = max(math.ceil(min_support * n), 1)
+    labels = list(df.columns) if use_colnames else range(matrix.shape[1])
+
+    counts = np.asarray(matrix.sum(axis=0)).ravel()
+    # Rarest items first keeps the intersections, and so the candidate lists, short
+    frequent = [c for c in np.argsort(counts, kind="stable") if counts[c] >= min_count]
+    bitmaps = pack_bitmaps(matrix, frequent)
+
+    supports, itemsets = [], []
+    stack = [((), None, np.arange(len(frequent)), counts[frequent])]
+    while stack:
+        prefix, prefix_bitmap, candidates, candidate_counts = stack.pop()
+        for k, (item, count) in enumerate(zip(candidates, candidate_counts)):
+            itemset = prefix + (item,)
+            supports.append(count / n)
+            itemsets.append(frozenset(labels[frequent[i]] for i in itemset))
+            if max_len is not None and len(itemset) >= max_len:
+                continue
+            rest = candidates[k + 1:]
+            if not len(rest):
+                continue
+            item_bitmap = bitmaps[item] if prefix_bitmap is None else bitmaps[item] & prefix_bitmap
+            rest_counts = support_counts(bitmaps[rest], item_bitmap)
+            keep = rest_counts >= min_count
+            if keep.any():
+                stack.append((itemset, item_bitmap, rest[keep], rest_counts[keep]))
+
+    return pd.DataFrame({"support": supports, "itemsets": itemsets}, columns=["support", "itemsets"])
+
+
+def itemset_counts(matrix, itemsets):
+    """Transactions containing each itemset, given as tuples of column positions."""
+    columns = sorted({c for itemset in itemsets for c in itemset})
+    counts = np.zeros(len(itemsets), dtype=np.int64)
+    if not columns:
+        return counts
+    bitmaps = pack_bitmaps(sparse.csc_matrix(matrix), columns)
+    row = {c: i for i, c in enumerate(columns)}
+    for k, itemset in enumerate(itemsets):
+        bitmap = np.bitwise_and.reduce(bitmaps[[row[c] for c in itemset]], axis=0)
+        counts[k] = _popcount(bitmap).sum(dtype=np.int64)
+    return counts
@@ -0,0 +1,86 @@
+# cooccurrence.py
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+RULE_COLUMNS = ["antecedents", "consequents", "antecedent support", "consequent support", "support", "confidence", "lift"]
+
+
+def cooccurrence_counts(matrix):
+    """Items x items counts XᵀX of a boolean transactions x items matrix; the diagonal holds item counts."""
+    counts = matrix.astype(np.int32)
+    return (counts.T @ counts).tocsr()
+
+
+def _frequent_pairs(counts, min_count):
+    pairs = sparse.triu(counts, k=1).tocoo()
+    keep = pairs.data >= min_count
+    return pairs.row[keep], pairs.col[keep], pairs.data[keep]
+
+
+def pair_itemsets(counts, items, min_count):
+    """Frequent single items and pairs, with exact support counts, as (itemsets, support_count) columns."""
+    singles = counts.diagonal()
+    frequent = np.flatnonzero(singles >= min_count)
+    a, b, together = _frequent_pairs(counts, min_count)
+    itemsets = [frozenset([items[i]]) for i in frequent] + [frozenset([items[i], items[j]]) for i, j in zip(a, b)]
+    return pd.DataFrame({
+        "itemsets": itemsets,
+        "support_count": np.concatenate([singles[frequent], together]).astype(np.int64)
+    })
+
+
+def pair_rules(counts, items, n, min_count, min_confidence):
+    """Every single-antecedent rule {a} -> {b} over a frequent pair, computed as array operations."""
+    singles = counts.diagonal().astype(np.float64)
+    a, b, together = _frequent_pairs(counts, min_count)
+    antecedent = np.concatenate([a, b])
+    consequent = np.concatenate([b, a])
+    together = np.concatenate([together, together]).astype(np.float64)
+
+    confidence = together / singles[antecedent]
+    keep = confidence >= min_confidence
+    antecedent, consequent, together, confidence = antecedent[keep], consequent[keep], together[keep], confidence[keep]
+    return pd.DataFrame({
+        "antecedents": [frozenset([items[i]]) for i in antecedent],
+        "consequents": [frozenset([items[i]]) for i in consequent],
+        "antecedent support": singles[antecedent] / n,
+        "consequent support": singles[consequent] / n,
+        "support": together / n,
+        "confidence": confidence,
+        "lift": confidence / (singles[consequent] / n)
+    }, columns=RULE_COLUMNS)
+
+
+def triangle_items(counts, min_count):
+    """
+    Items that could be in a frequent 3+ itemset: every pair inside one must be frequent, so an
+    item qualifies only if it closes a triangle of frequent pairs.
+    """
+    a, b, _ = _frequent_pairs(counts, min_count)
+    size = counts.shape[0]
+    frequent = sparse.coo_matrix((np.ones(len(a), dtype=np.int32), (a, b)), shape=(size, size)).tocsr()
+    frequent = frequent + frequent.T
+    closed = frequent.multiply(frequent @ frequent)
+    return np.asarray(closed.sum(axis=1)).ravel() > 0
+
+
+def itemset_rules(itemsets, support_counts, n, min_confidence):
+    """
+    Rules from 3+ item itemsets, split every way into antecedent and consequent like
+    mlxtend's association_rules. `support_counts` maps each frequent itemset to its count.
+    """
+    rows = []
+    for itemset in itemsets:
+        together = support_counts[itemset]
+        for size in range(1, len(itemset)):
+            for antecedent in map(frozenset, combinations(itemset, size)):
+                confidence = together / support_counts[antecedent]
+                if confidence < min_confidence:
+                    continue
+                consequent = itemset - antecedent
+                rows.append((antecedent, consequent, support_counts[antecedent] / n, support_counts[consequent] / n,
+                             together / n, confidence, confidence * n / support_counts[consequent]))
+    return pd.DataFrame(rows, columns=RULE_COLUMNS)
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import clsx from 'clsx';
 import Plot from 'react-plotly.js';
@@ -10,27 +10,43 @@ import { Input } from '@/components/ui/input';
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs';
 import { Search, TrendingUp } from 'lucide-react';
 
+const PAGE_SIZE = 60;
+// Wait this long after the last keystroke before searching on the server
+const SEARCH_DEBOUNCE_MS = 300;
+
 const TrendAnalysis = () => {
   const [summaryData, setSummaryData] = useState([]);
+  const [totalCount, setTotalCount] = useState(0);
   const [selectedProduct, setSelectedProduct] = useState(null);
   const [detailData, setDetailData] = useState(null);
   const [search, setSearch] = useState('');
+  const [debouncedSearch, setDebouncedSearch] = useState('');
+  const latestSummaryRequest = useRef(0);
   const [isLoading, setIsLoading] = useState(false);
   const [isDetailLoading, setIsDetailLoading] = useState(false);
   const [sourceSystem, setSourceSystem] = useState('eon');
 
-  const fetchSummary = async () => {
+  const fetchSummary = async (offset = 0) => {
+    // Responses to anything but the latest request are stale and must not overwrite it
+    const requestId = ++latestSummaryRequest.current;
     setIsLoading(true);
     try {
       const response = await axios.post('http://localhost:5000/analysis/summary', {
         source_system: sourceSystem,
-        analysis_type: 'trend_analysis'
+        analysis_type: 'trend_analysis',
+        search: debouncedSearch,
+        offset,
+        limit: PAGE_SIZE
       });
-      setSummaryData(response.data);
+      if (requestId !== latestSummaryRequest.current) return;
+      setSummaryData(prev => (offset === 0 ? response.data : [...prev, ...response.data]));
+      setTotalCount(Number(response.headers['x-total-count'] ?? response.data.length));
     } catch (error) {
       console.error('Error fetching summary:', error);
     } finally {
-      setIsLoading(false);
+      if (requestId === latestSummaryRequest.current) {
+        setIsLoading(false);
+      }
     }
   };
 
@@ -51,9 +67,14 @@ const TrendAnalysis = () => {
     }
   };
 
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(search), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [search]);
+
   useEffect(() => {
     fetchSummary();
-  }, [sourceSystem]);
+  }, [sourceSystem, debouncedSearch]);
 
   const handleProductClick = (product) => {
     setSelectedProduct(product);
@@ -92,10 +113,6 @@ const TrendAnalysis = () => {
     </div>
   );
 
-  const filteredData = summaryData.filter(item =>
-    item.product.toLowerCase().includes(search.toLowerCase())
-  );
-
   const containerClasses = "bg-background p-4 space-y-4 min-h-screen";
 
   if (selectedProduct && detailData) {
@@ -240,7 +257,7 @@ const TrendAnalysis = () => {
         </div>
       ) : (
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-          {filteredData.map((item, index) => {
+          {summaryData.map((item, index) => {
             const isSelected = selectedProduct === item.product;
             return (
               <div
@@ -268,7 +285,15 @@ const TrendAnalysis = () => {
         </div>
       )}
 
-      {filteredData.length === 0 && !isLoading && (
+      {summaryData.length < totalCount && !isLoading && (
+        <div className="flex justify-center">
+          <Button variant="outline" onClick={() => fetchSummary(summaryData.length)}>
+            Load more ({summaryData.length} of {totalCount})
+          </Button>
+        </div>
+      )}
+
+      {summaryData.length === 0 && !isLoading && (
         <div className="text-center py-12">
           <h3 className="text-lg font-semibold mb-2">No products found</h3>
           <p className="text-muted-foreground">Try adjusting your search terms</p>
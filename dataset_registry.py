@@ -0,0 +1,187 @@
+# dataset_registry.py
+import os
+import threading
+import time
+from datetime import datetime
+
+from ingest_cache import source_fingerprint
+
+# ---------- CONFIG ----------
+# How often a read re-stats the source file, and how often the background watcher polls
+POLL_INTERVAL_SECONDS = 2.0
+
+_MISSING = object()
+
+
+class _Entry:
+    __slots__ = ("frame", "stat", "generation", "loaded_at", "load_seconds", "derived")
+
+    def __init__(self, frame, stat, generation, load_seconds):
+        self.frame = frame
+        self.stat = stat
+        self.generation = generation
+        self.loaded_at = datetime.now().isoformat()
+        self.load_seconds = load_seconds
+        self.derived = {}
+
+
+class DatasetRegistry:
+    """
+    Process-wide store of loaded source frames, keyed by absolute file path.
+
+    Each path is loaded once with its loader and replaced wholesale when the file changes:
+    the new frame is built off to the side and swapped in with a single assignment, so a
+    request holding the previous frame keeps a complete, consistent copy.
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL_SECONDS):
+        self.poll_interval = poll_interval
+        self._entries = {}
+        self._loaders = {}
+        self._checked_at = {}
+        self._load_locks = {}
+        self._listeners = {}
+        self._carried = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def get(self, path, loader):
+        """Return the current frame for `path` as a shallow copy callers may rename or extend."""
+        return self._current(os.path.abspath(path), loader).frame.copy(deep=False)
+
+    def derived(self, path, loader, name, build, carry=False):
+        """
+        Return `build(frame)` for the current version of `path`.
+
+        Derived structures (indexes, precomputed tables) are stored on the entry they were built
+        from, so they are computed once per load and dropped together with the frame on reload.
+        With carry=True the newest value built for any version of the file is also kept, and
+        `build(frame, previous)` gets it (or None), e.g. to update counts incrementally. A build
+        for an older version than the kept value's never replaces it.
+        """
+        key = os.path.abspath(path)
+        entry = self._current(key, loader)
+        value = entry.derived.get(name, _MISSING)
+        if value is _MISSING:
+            with self._load_lock(key):
+                value = entry.derived.get(name, _MISSING)
+                if value is _MISSING:
+                    if carry:
+                        carried = self._carried.setdefault(key, {})
+                        generation, previous = carried.get(name, (0, None))
+                        value = build(entry.frame, previous)
+                        if entry.generation >= generation:
+                            carried[name] = (entry.generation, value)
+                    else:
+                        value = build(entry.frame)
+                    entry.derived[name] = value
+        return value
+
+    def _current(self, key, loader):
+        with self._lock:
+            self._loaders.setdefault(key, loader)
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and now - self._checked_at.get(key, 0) < self.poll_interval:
+                return entry
+            self._checked_at[key] = now
+        return self._reload_if_changed(key) or entry
+
+    def _reload_if_changed(self, key):
+        try:
+            stat = source_fingerprint(key)
+        except OSError:
+            # File briefly missing mid-replace: keep serving what we have
+            if key in self._entries:
+                return None
+            raise
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.stat == stat:
+            return entry
+
+        with self._load_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None and entry.stat == stat:
+                return entry
+            started = time.perf_counter()
+            try:
+                frame = self._loaders[key](key)
+            except Exception as e:
+                # Half-written file: keep serving the previous frame and retry on the next poll
+                if entry is None:
+                    raise
+                print(f"⚠️ Reload failed for {key}, keeping generation {entry.generation}: {e}")
+                return entry
+            generation = entry.generation + 1 if entry is not None else 1
+            new_entry = _Entry(frame, stat, generation, time.perf_counter() - started)
+            self._entries[key] = new_entry
+
+        if entry is not None:
+            self._notify(key)
+        return new_entry
+
+    def add_listener(self, path, callback):
+        """Call `callback(path)` after each reload of `path`, e.g. to rebuild precomputed tables."""
+        key = os.path.abspath(path)
+        with self._lock:
+            listeners = self._listeners.setdefault(key, [])
+            if callback not in listeners:
+                listeners.append(callback)
+
+    def _notify(self, key):
+        for callback in list(self._listeners.get(key, ())):
+            try:
+                callback(key)
+            except Exception as e:
+                print(f"⚠️ Reload listener failed for {key}: {e}")
+
+    def _load_lock(self, key):
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def refresh(self):
+        """Re-check every registered path and reload the ones whose file changed."""
+        for key in list(self._loaders):
+            try:
+                self._reload_if_changed(key)
+                self._checked_at[key] = time.monotonic()
+            except Exception as e:
+                print(f"⚠️ Reload failed for {key}: {e}")
+
+    def start_watcher(self):
+        """Poll registered files in a daemon thread so reloads happen off the request path."""
+        if self._watcher is not None:
+            return
+
+        def _watch():
+            while True:
+                time.sleep(self.poll_interval)
+                self.refresh()
+
+        self._watcher = threading.Thread(target=_watch, name="dataset-watcher", daemon=True)
+        self._watcher.start()
+
+    def version(self, path):
+        entry = self._entries.get(os.path.abspath(path))
+        return entry.generation if entry is not None else 0
+
+    def stats(self):
+        rows = []
+        for key, entry in sorted(self._entries.items()):
+            rows.append({
+                "path": key,
+                "generation": entry.generation,
+                "loaded_at": entry.loaded_at,
+                "load_seconds": round(entry.load_seconds, 4),
+                "rows": len(entry.frame),
+                "memory_mb": round(float(entry.frame.memory_usage(deep=True).sum()) / 1024 ** 2, 2),
+                "derived": sorted(entry.derived)
+            })
+        return rows
+
+
+registry = DatasetRegistry()
+
+def get_dataset(path, loader):
+    return registry.get(path, loader)
@@ -1,34 +1,32 @@
 import sys
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from datetime import timedelta
 
 # Import core logic from your old app
 from core_logic import init_all_db_resources, process_question
 
 # Import analytics modules
-from trend_analysis import generate_summary, generate_detail, get_valid_sources
-from demand_forecast import get_forecast_summary, get_forecast_detail
-from product_bundles import get_product_bundles, get_recommendations
+from trend_analysis import generate_summary_page, generate_detail, get_valid_sources, load_trend_tables, TIME_RANGE_MAP, SUMMARY_SORT_FIELDS, DETAIL_GRANULARITIES
+from demand_forecast import (get_forecast_summary, get_forecast_detail, get_routing_report, get_cache_stats,
+                             submit_forecast_job, get_forecast_job, get_hierarchy_forecast, submit_hierarchy_job, FORECAST_ENGINES)
+from forecast_hierarchy import TOTAL_LEVEL, HIERARCHY_LEVELS
+from product_bundles import get_product_bundles, get_recommendations, MINING_ENGINES, DEFAULT_MINING_ENGINE
 from product_similarity import compute_product_similarity
+from dataset_registry import registry
 
 # Initialize app
 app = Flask(__name__)
-CORS(app)
-
-# Time range mapping
-TIME_RANGE_MAP = {
-    "1w": timedelta(weeks=1),
-    "1m": timedelta(days=30),
-    "1y": timedelta(days=365),
-    "2y": timedelta(days=730)
-}
+CORS(app, expose_headers=["X-Total-Count"])
 
 ### ----- HEALTH CHECK ROUTE ----- ###
 @app.route("/api/health", methods=["GET"])
 def health_check():
     return jsonify({"status": "ok"})
 
+@app.route("/api/datasets", methods=["GET"])
+def dataset_stats():
+    return jsonify(registry.stats())
+
 ### ----- LLM QUERY ROUTE ----- ###
 @app.route("/api/query", methods=["POST"])
 def handle_query():
@@ -50,7 +48,7 @@ def handle_query():
         return jsonify(result)
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500)
+        return jsonify({"error": str(e)}), 500
 
 ### ----- TREND ANALYSIS ROUTES ----- ###
 @app.route("/analysis/summary", methods=["POST"])
@@ -62,9 +60,26 @@ def trend_summary():
     if not source or analysis_type != "trend_analysis":
         return jsonify({"error": "Missing or invalid parameters"}), 400
 
+    max_points = data.get("max_points")
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 3):
+        return jsonify({"error": "Invalid max_points"}), 400
+
+    search = data.get("search")
+    sort_by = data.get("sort_by", "trend_percent")
+    order = data.get("order", "desc")
+    offset = data.get("offset", 0)
+    limit = data.get("limit")
+    if sort_by not in SUMMARY_SORT_FIELDS or order not in ("asc", "desc"):
+        return jsonify({"error": "Invalid sort_by or order"}), 400
+    if not isinstance(offset, int) or offset < 0 or (limit is not None and (not isinstance(limit, int) or limit < 1)):
+        return jsonify({"error": "Invalid offset or limit"}), 400
+
     try:
-        result = generate_summary(source)
-        return jsonify(result)
+        page = generate_summary_page(source, max_points=max_points, search=search, sort_by=sort_by,
+                                     order=order, offset=offset, limit=limit)
+        response = jsonify(page["products"])
+        response.headers["X-Total-Count"] = str(page["total"])
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -82,8 +97,17 @@ def trend_detail():
     if time_range not in TIME_RANGE_MAP:
         return jsonify({"error": "Invalid time_range"}), 400
 
+    granularity = data.get("granularity", "day")
+    if granularity not in DETAIL_GRANULARITIES:
+        return jsonify({"error": "Invalid granularity"}), 400
+
+    max_points = data.get("max_points")
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 3):
+        return jsonify({"error": "Invalid max_points"}), 400
+
     try:
-        result = generate_detail(source, product, TIME_RANGE_MAP[time_range])
+        result = generate_detail(source, product, TIME_RANGE_MAP[time_range], max_points=max_points,
+                                 granularity=granularity)
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -101,8 +125,12 @@ def forecast_summary():
     if not source:
         return jsonify({"error": "Missing source_system"}), 400
 
+    engine = data.get("engine", "prophet")
+    if engine not in FORECAST_ENGINES:
+        return jsonify({"error": "Invalid engine"}), 400
+
     try:
-        product_list = get_forecast_summary(source)
+        product_list = get_forecast_summary(source, engine=engine)
         return jsonify({"products": product_list})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -116,12 +144,100 @@ def forecast_detail():
     if not source or not product:
         return jsonify({"error": "Missing source_system or product"}), 400
 
+    engine = data.get("engine", "prophet")
+    if engine not in FORECAST_ENGINES:
+        return jsonify({"error": "Invalid engine"}), 400
+
     try:
-        forecast = get_forecast_detail(source, product)
+        forecast = get_forecast_detail(source, product, engine=engine)
         return jsonify(forecast)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/forecast/routing", methods=["POST"])
+def forecast_routing():
+    data = request.get_json()
+    source = data.get("source_system")
+
+    if not source:
+        return jsonify({"error": "Missing source_system"}), 400
+
+    try:
+        return jsonify(get_routing_report(source))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/forecast/cache", methods=["GET"])
+def forecast_cache_stats():
+    return jsonify(get_cache_stats())
+
+@app.route("/forecast/hierarchy", methods=["POST"])
+def forecast_hierarchy():
+    data = request.get_json()
+    source = data.get("source_system")
+    level = data.get("level", TOTAL_LEVEL)
+
+    if not source:
+        return jsonify({"error": "Missing source_system"}), 400
+
+    if level != TOTAL_LEVEL and level not in HIERARCHY_LEVELS:
+        return jsonify({"error": "Invalid level"}), 400
+
+    engine = data.get("engine", "fast")
+    if engine not in FORECAST_ENGINES:
+        return jsonify({"error": "Invalid engine"}), 400
+
+    try:
+        # Prophet roll-ups may fit the whole catalogue: queue them and poll /forecast/jobs/<id>
+        if engine == "prophet":
+            job = submit_hierarchy_job(source, level=level, engine=engine)
+            return jsonify(job.to_dict()), 202
+        return jsonify(get_hierarchy_forecast(source, level=level, engine=engine))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+### ----- FORECAST JOB ROUTES ----- ###
+@app.route("/forecast/jobs", methods=["POST"])
+def create_forecast_job():
+    data = request.get_json()
+    source = data.get("source_system")
+    product = data.get("product")
+    products = data.get("products")
+
+    if not source:
+        return jsonify({"error": "Missing source_system"}), 400
+
+    engine = data.get("engine", "prophet")
+    if engine not in FORECAST_ENGINES:
+        return jsonify({"error": "Invalid engine"}), 400
+
+    if products is not None and not isinstance(products, list):
+        return jsonify({"error": "Invalid products"}), 400
+
+    try:
+        job = submit_forecast_job(source, product=product, products=products, engine=engine)
+        return jsonify(job.to_dict()), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/forecast/jobs/<job_id>", methods=["GET"])
+def forecast_job_status(job_id):
+    job = get_forecast_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/forecast/jobs/<job_id>/result", methods=["GET"])
+def forecast_job_result(job_id):
+    job = get_forecast_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if not job.finished:
+        return jsonify(job.to_dict()), 202
+    if job.error is not None:
+        return jsonify({"error": job.error}), 500
+    return jsonify(job.result)
+
 ### ----- PRODUCT BUNDLING ROUTES ----- ###
 @app.route("/bundles", methods=["POST"])
 def fetch_bundles():
@@ -131,8 +247,12 @@ def fetch_bundles():
     if not source:
         return jsonify({"error": "Missing source_system"}), 400
 
+    engine = data.get("engine", DEFAULT_MINING_ENGINE)
+    if engine not in MINING_ENGINES:
+        return jsonify({"error": "Invalid engine"}), 400
+
     try:
-        bundles = get_product_bundles(source)
+        bundles = get_product_bundles(source, engine=engine)
         return jsonify({"bundles": bundles})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -145,8 +265,12 @@ def fetch_recommendations():
     if not source:
         return jsonify({"error": "Missing source_system"}), 400
 
+    engine = data.get("engine", DEFAULT_MINING_ENGINE)
+    if engine not in MINING_ENGINES:
+        return jsonify({"error": "Invalid engine"}), 400
+
     try:
-        recommendations = get_recommendations(source)
+        recommendations = get_recommendations(source, engine=engine)
         return jsonify({"recommendations": recommendations})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -164,8 +288,10 @@ def get_similarity():
 def main():
     print("🚀 Initializing database resources...")
     init_all_db_resources()
+    load_trend_tables()
+    registry.start_watcher()
     print("🚀 Starting Flask server on port 5000...")
-    app.run(host="0.0.0.0", port=5000, debug=False, threaded=False)
+    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True)
 
 if __name__ == "__main__":
     try:
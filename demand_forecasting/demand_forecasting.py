@@ -1,8 +1,23 @@
 # demand_forecast.py
+import numpy as np
 import pandas as pd
 from prophet import Prophet
 from datetime import timedelta
 import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from ingest_cache import read_excel_cached
+from dataset_registry import get_dataset, registry
+from product_index import get_product_index
+from fast_forecast import get_fast_forecast, forecast_store
+from forecast_hierarchy import read_location, share_matrix, reconcile, TOTAL_LEVEL, HIERARCHY_LEVELS
+from forecast_router import route_products, load_velocity_classes, INACTIVE_TIER, INTERMITTENT_TIER, SMOOTHING_TIER, PROPHET_TIER, VECTORISED_TIERS
+from timeseries_store import store_from_index
+from single_flight_cache import SingleFlightCache
+from job_queue import JobQueue
 
 SOURCE_FILE_MAP = {
     "eon": "data/sorted_file_eon.xlsx",
@@ -10,59 +25,343 @@ SOURCE_FILE_MAP = {
     "xyz": "data/sorted_file_xyz.xlsx"
 }
 
-# Cache results to avoid recomputation
-_forecast_cache = {}
+# Velocity classes exported by n8n/classification, used to route products to forecast tiers
+CLASSIFICATION_FILE = "data/product_classification_{source}.csv"
+
+# PRODUCT/BRAND/STATE_NAME hierarchy for brand and state forecast roll-ups, keyed like
+# SOURCE_FILE_MAP; sources without a location export only roll up to the total level
+LOCATION_FILE_MAP = {
+    "eon": "data/Eon.csv"
+}
+# Prophet's default interval_width is 0.8, so its bounds sit 1.2816 sigma either side of yhat
+PROPHET_INTERVAL_Z = 1.2816
+
+# Routing tables, vectorised tier forecasts and per-product Prophet forecasts, keyed by
+# (source, data version, ...). Least recently used entries are evicted beyond this many, plus
+# room for every Prophet product of the largest catalogue loaded, so prewarmed fits are kept.
+FORECAST_CACHE_SIZE = 2048
+forecast_cache = SingleFlightCache(FORECAST_CACHE_SIZE)
+_prewarm_lock = threading.Lock()
+_prewarm_threads = {}
+
+# Prophet fits fan out over this many worker processes (1 fits in-process on the main thread only)
+FORECAST_WORKERS = os.cpu_count() or 1
+# Wall-clock budget for one product's fit; slower series get the mean forecast instead
+FIT_TIMEOUT_SECONDS = 300
+# Start fitting Prophet products in the background, biggest sellers first, on /forecast/summary
+PREWARM_ON_SUMMARY = False
+PREWARM_BATCH_SIZE = 32
+
+# Threads running queued forecast jobs (Prophet batches inside them still use FORECAST_WORKERS processes)
+JOB_WORKERS = 2
+forecast_jobs = JobQueue(JOB_WORKERS)
+
+# "fast" forecasts every product at once with NumPy smoothing/linear models instead of Prophet
+FORECAST_ENGINES = ("prophet", "fast")
+
+class FitTimeout(Exception):
+    pass
+
+def _read_daily(path):
+    return read_excel_cached(path, date_columns=["date"])
 
 def load_data(source_system):
     if source_system not in SOURCE_FILE_MAP:
         raise ValueError(f"Unknown source system: {source_system}")
-    df = pd.read_excel(SOURCE_FILE_MAP[source_system])
+    df = get_dataset(SOURCE_FILE_MAP[source_system], _read_daily)
     df.rename(columns={"date": "ds", "total_orders": "y", "product": "product_name"}, inplace=True)
-    df["ds"] = pd.to_datetime(df["ds"])
     return df
 
-def generate_forecasts(df):
-    all_forecasts = {}
-    for product in df["product_name"].unique():
-        df_prod = df[df["product_name"] == product][["ds", "y"]].copy()
-
-        if df_prod.shape[0] >= 60 and df_prod["y"].sum() >= 10:
-            model = Prophet(daily_seasonality=True, yearly_seasonality=True)
-            model.fit(df_prod)
-
-            future = model.make_future_dataframe(periods=30)
-            forecast = model.predict(future)
-
-            forecast = forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].copy()
-            forecast["product_name"] = product
-        else:
-            mean_y = df_prod.tail(30)["y"].mean() if df_prod.shape[0] >= 30 else df_prod["y"].mean()
-            last_date = df_prod["ds"].max() if not df_prod.empty else pd.to_datetime("2025-05-15")
-            future_dates = pd.date_range(start=last_date + timedelta(days=1), periods=30)
-
-            forecast = pd.DataFrame({
-                "ds": future_dates,
-                "yhat": [mean_y] * 30,
-                "yhat_lower": [mean_y * 0.9] * 30,
-                "yhat_upper": [mean_y * 1.1] * 30,
-                "product_name": product
-            })
-
-        all_forecasts[product] = forecast
+def load_index(source_system):
+    if source_system not in SOURCE_FILE_MAP:
+        raise ValueError(f"Unknown source system: {source_system}")
+    return get_product_index(SOURCE_FILE_MAP[source_system], _read_daily)
+
+def product_series(index, product):
+    return index.rows(product)[["date", "total_orders"]].rename(columns={"date": "ds", "total_orders": "y"})
+
+def has_sufficient_data(df_prod):
+    return df_prod.shape[0] >= 60 and df_prod["y"].sum() >= 10
+
+def _raise_fit_timeout(signum, frame):
+    raise FitTimeout()
+
+def fit_prophet(product, df_prod, timeout=None):
+    """
+    Fit Prophet to one product and forecast 30 days past its history.
+
+    Runs inside a pool worker, so it only takes picklable arguments. When `timeout` is set and
+    SIGALRM is available, a fit that overruns raises FitTimeout instead of holding the worker.
+    """
+    use_alarm = (timeout is not None and hasattr(signal, "SIGALRM")
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_fit_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        model = Prophet(daily_seasonality=True, yearly_seasonality=True)
+        model.fit(df_prod)
+
+        future = model.make_future_dataframe(periods=30)
+        forecast = model.predict(future)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    forecast = forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].copy()
+    forecast["product_name"] = product
+    return forecast
+
+def mean_forecast(product, df_prod):
+    """Flat 30-day forecast at the recent mean, ±10%."""
+    mean_y = df_prod.tail(30)["y"].mean() if df_prod.shape[0] >= 30 else df_prod["y"].mean()
+    last_date = df_prod["ds"].max() if not df_prod.empty else pd.to_datetime("2025-05-15")
+    future_dates = pd.date_range(start=last_date + timedelta(days=1), periods=30)
+
+    return pd.DataFrame({
+        "ds": future_dates,
+        "yhat": [mean_y] * 30,
+        "yhat_lower": [mean_y * 0.9] * 30,
+        "yhat_upper": [mean_y * 1.1] * 30,
+        "product_name": product
+    })
+
+# One process pool per worker count, shared by every caller and replaced if a worker dies
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _fit_pool(workers, broken=None):
+    """The shared pool with `workers` processes, replacing `broken` if it is still the current one."""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None or pool is broken:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+def _fit_round(series, workers, timeout, results):
+    """Fit `series` on the shared pool; returns the products lost to a worker dying, with the error."""
+    pool = _fit_pool(workers)
+    broken = {}
+    futures = {pool.submit(fit_prophet, product, df_prod, timeout): product
+               for product, df_prod in series.items()}
+    for future in as_completed(futures):
+        try:
+            results[futures[future]] = future.result()
+        except BrokenProcessPool as e:
+            broken[futures[future]] = e
+        except Exception as e:
+            results[futures[future]] = e
+    if broken:
+        _fit_pool(workers, broken=pool)
+    return broken
+
+def _fit_all(series, workers, timeout):
+    """Prophet forecast per product, or the exception that stopped it."""
+    # SIGALRM timeouts only work on the main thread; off it every fit goes to a worker process,
+    # even with workers <= 1, so the timeout always applies
+    on_main = threading.current_thread() is threading.main_thread()
+    if on_main and (workers <= 1 or len(series) <= 1):
+        results = {}
+        for product, df_prod in series.items():
+            try:
+                results[product] = fit_prophet(product, df_prod, timeout)
+            except Exception as e:
+                results[product] = e
+        return results
+
+    results = {}
+    workers = max(workers, 1)
+    # A dying worker breaks every pending future, not just its own. Survivors are resubmitted to
+    # a fresh pool; if that breaks too, the rest run one per round so only the culprit fails.
+    broken = _fit_round(series, workers, timeout, results)
+    if broken:
+        broken = _fit_round({product: series[product] for product in broken}, workers, timeout, results)
+    for product in list(broken):
+        retry = _fit_round({product: series[product]}, workers, timeout, results)
+        results.update(retry)
+    return results
+
+class LazyForecasts:
+    """
+    Forecasts for one version of a source's data, computed per product on first request.
+
+    Routing happens up front from the product index. The inactive, TSB and smoothing tiers are
+    vectorised, so the first request for any of their products forecasts the whole tier at once;
+    Prophet products are fitted one at a time, or in batches by `prewarm`. Results live in
+    `cache` under `key` + ("tier", tier) or ("product", product). `report` counts the products
+    per tier, how many forecasts were computed and the seconds spent.
+    """
+
+    TIER_MODELS = {INACTIVE_TIER: "zero", INTERMITTENT_TIER: "tsb", SMOOTHING_TIER: "auto"}
+
+    def __init__(self, index, classes=None, cache=None, key=()):
+        self.index = index
+        self.store = store_from_index(index)
+        # has_sufficient_data for every product from the index offsets, without slicing series
+        counts = np.diff(index.offsets)
+        totals = np.add.reduceat(index.frame["total_orders"].to_numpy(dtype=np.float64), index.offsets[:-1])
+        self.tiers = route_products(self.store, (counts >= 60) & (totals >= 10), classes or {})
+        self.tier = {product: tier for tier, products in self.tiers.items() for product in products}
+        # One entry per Prophet product plus one per tier (and the routing entry itself) must fit
+        entries = len(self.tiers[PROPHET_TIER]) + len(self.tiers) + 1
+        if cache is not None:
+            cache.ensure_capacity(FORECAST_CACHE_SIZE + entries)
+        self.cache = cache if cache is not None else SingleFlightCache(entries)
+        self.key = key
+        self.report = {tier: {"products": len(products), "computed": 0, "failed": 0, "seconds": 0.0}
+                       for tier, products in self.tiers.items()}
+        self.lock = threading.Lock()
+
+    def get(self, product, timeout=FIT_TIMEOUT_SECONDS):
+        """The product's 30-day forecast frame, computing it now if needed; None for unknown products."""
+        tier = self.tier.get(product)
+        if tier is None:
+            return None
+        if tier != PROPHET_TIER:
+            return self.tier_forecast(tier).frame(product)
+        return self.cache.get_or_compute(self.key + ("product", product),
+                                         lambda: self._fit([product], None, timeout)[product])
+
+    def tier_forecast(self, tier):
+        """FastForecast arrays for every product of a vectorised tier."""
+        return self.cache.get_or_compute(self.key + ("tier", tier), lambda: self._forecast_tier(tier))
+
+    def _forecast_tier(self, tier):
+        started = time.perf_counter()
+        fast = forecast_store(self.store, self.TIER_MODELS[tier], products=self.tiers[tier])
+        self._record(tier, len(self.tiers[tier]), 0, started)
+        return fast
+
+    def _record(self, tier, computed, failed, started):
+        with self.lock:
+            stats = self.report[tier]
+            stats["computed"] += computed
+            stats["failed"] += failed
+            stats["seconds"] += time.perf_counter() - started
+
+    def _fit(self, products, workers, timeout):
+        """Prophet forecasts for `products`; a fit that fails or times out gets the flat mean forecast."""
+        started = time.perf_counter()
+        series = {product: product_series(self.index, product) for product in products}
+        fits = _fit_all(series, FORECAST_WORKERS if workers is None else workers, timeout)
+        failed = 0
+        for product, forecast in fits.items():
+            if isinstance(forecast, Exception):
+                reason = "timed out" if isinstance(forecast, FitTimeout) else f"failed ({forecast!r})"
+                print(f"⚠️ Prophet fit {reason} for {product}; using mean forecast")
+                fits[product] = mean_forecast(product, series[product])
+                failed += 1
+        self._record(PROPHET_TIER, len(fits), failed, started)
+        return fits
+
+    def fit(self, products, workers=None, timeout=FIT_TIMEOUT_SECONDS):
+        """
+        {product: forecast} for Prophet `products`, fitting the uncached ones together across the
+        process pool. Products another request is already fitting are waited for, not refitted.
+        """
+        keys = {self.key + ("product", product): product for product in products}
+
+        def compute(missing):
+            fits = self._fit([keys[key] for key in missing], workers, timeout)
+            return {key: fits[keys[key]] for key in missing}
+
+        values = self.cache.get_or_compute_many(list(keys), compute)
+        return {keys[key]: forecast for key, forecast in values.items()}
+
+    def prewarm(self, workers=None, batch_size=PREWARM_BATCH_SIZE):
+        """Fit every pending Prophet product, highest total sales first, in batches of `batch_size`."""
+        totals = self.store.totals()
+        order = sorted(self.tiers[PROPHET_TIER], key=lambda p: -totals[p])
+        for i in range(0, len(order), batch_size):
+            self.fit(order[i:i + batch_size], workers=workers)
+
+def _current_index(source_system):
+    """(registry generation, ProductIndex) of a source, re-read if it reloads in between."""
+    path = SOURCE_FILE_MAP[source_system]
+    while True:
+        version = registry.version(path)
+        index = load_index(source_system)
+        if registry.version(path) == version:
+            return version, index
+
+def _drop_stale_forecasts(path):
+    # Registry reload listener: entries for older versions of the file can never be hit again
+    version = registry.version(path)
+    forecast_cache.discard(lambda key: os.path.abspath(SOURCE_FILE_MAP[key[0]]) == path and key[1] != version)
+
+def lazy_forecasts(source_system):
+    """The LazyForecasts for the current data of a source."""
+    version, index = _current_index(source_system)
+    registry.add_listener(SOURCE_FILE_MAP[source_system], _drop_stale_forecasts)
+    key = (source_system, version)
+
+    def build():
+        classes = load_velocity_classes(CLASSIFICATION_FILE.format(source=source_system))
+        return LazyForecasts(index, classes, cache=forecast_cache, key=key)
+
+    return forecast_cache.get_or_compute(key + ("routing",), build)
+
+def start_prewarm(source_system, workers=None):
+    """Fit a source's Prophet products in a daemon thread unless one is already running."""
+    with _prewarm_lock:
+        thread = _prewarm_threads.get(source_system)
+        if thread is not None and thread.is_alive():
+            return
+        thread = threading.Thread(target=lambda: lazy_forecasts(source_system).prewarm(workers), daemon=True)
+        _prewarm_threads[source_system] = thread
+    thread.start()
+
+def generate_forecasts(index, workers=None, timeout=FIT_TIMEOUT_SECONDS, classes=None, report=None):
+    """
+    30-day forecast for every product in the index, keyed by product.
+
+    Products are routed by forecast_router: stopped ones get zero, intermittent ones TSB, mid-volume
+    ones vectorised smoothing, and only high-movers with enough history are fitted with Prophet
+    across `workers` processes (FORECAST_WORKERS by default). Per-tier counts and seconds go
+    into `report`.
+    """
+    forecasts = LazyForecasts(index, classes)
+    forecasts.fit(forecasts.tiers[PROPHET_TIER], workers=workers, timeout=timeout)
+    all_forecasts = {product: forecasts.get(product) for product in index.products}
+    if report is not None:
+        report.update(forecasts.report)
+
+    print("📊 Forecast tiers: " + ", ".join(f"{tier} {stats['products']} in {stats['seconds']:.3f}s"
+                                           for tier, stats in forecasts.report.items()))
     return all_forecasts
 
-def get_forecast_summary(source_system):
-    if source_system not in _forecast_cache:
-        df = load_data(source_system)
-        _forecast_cache[source_system] = generate_forecasts(df)
-    return sorted(_forecast_cache[source_system].keys())
+def get_routing_report(source_system):
+    """Per-tier product counts, forecasts computed and seconds spent for the current data of a source."""
+    forecasts = lazy_forecasts(source_system)
+    with forecasts.lock:
+        return {tier: {**stats, "seconds": round(stats["seconds"], 3)} for tier, stats in forecasts.report.items()}
+
+def get_cache_stats():
+    return forecast_cache.stats()
 
-def get_forecast_detail(source_system, product):
-    if source_system not in _forecast_cache:
-        df = load_data(source_system)
-        _forecast_cache[source_system] = generate_forecasts(df)
+def fast_forecasts(source_system):
+    if source_system not in SOURCE_FILE_MAP:
+        raise ValueError(f"Unknown source system: {source_system}")
+    return get_fast_forecast(SOURCE_FILE_MAP[source_system])
 
-    product_forecast = _forecast_cache[source_system].get(product)
+def get_forecast_summary(source_system, engine="prophet"):
+    if engine == "fast":
+        return sorted(fast_forecasts(source_system).products)
+    # Product names come straight from the index; nothing is fitted until a detail request
+    products = load_index(source_system).products
+    if PREWARM_ON_SUMMARY:
+        start_prewarm(source_system)
+    return list(products)
+
+def get_forecast_detail(source_system, product, engine="prophet"):
+    if engine == "fast":
+        forecasts = fast_forecasts(source_system)
+        product_forecast = forecasts.frame(product) if product in forecasts else None
+    else:
+        product_forecast = lazy_forecasts(source_system).get(product)
     if product_forecast is None:
         raise ValueError(f"No forecast found for product: {product}")
 
@@ -75,3 +374,145 @@ def get_forecast_detail(source_system, product):
         "total_forecast": round(df_selected["yhat"].sum(), 2),
         "forecast_data": df_selected.to_dict(orient="records")
     }
+
+# ---------- HIERARCHY ----------
+def _horizon_forecasts(source_system, engine, progress):
+    """Products, dates, yhat and sigma (products x days) over the 30 days after the source's last date."""
+    if engine == "fast":
+        forecasts = fast_forecasts(source_system)
+        progress(len(forecasts.products), len(forecasts.products))
+        return forecasts.products, forecasts.dates, forecasts.yhat, forecasts.sigma
+
+    forecasts = lazy_forecasts(source_system)
+    products = forecasts.store.products
+    dates = pd.date_range(forecasts.store.dates[-1] + timedelta(days=1), periods=30, name="ds")
+    position = {product: i for i, product in enumerate(products)}
+    yhat = np.zeros((len(products), len(dates)))
+    sigma = np.zeros_like(yhat)
+    prophet = forecasts.tiers[PROPHET_TIER]
+    progress(0, len(products))
+
+    for tier in VECTORISED_TIERS:
+        if forecasts.tiers[tier]:
+            fast = forecasts.tier_forecast(tier)
+            rows = [position[product] for product in fast.products]
+            yhat[rows] = fast.yhat
+            sigma[rows] = fast.sigma
+    done = len(products) - len(prophet)
+    progress(done)
+    # Fitted values are used as each batch returns, so a catalogue larger than the cache never refits
+    for i in range(0, len(prophet), PREWARM_BATCH_SIZE):
+        for product, forecast in forecasts.fit(prophet[i:i + PREWARM_BATCH_SIZE]).items():
+            # Prophet forecasts start after the product's own last date; days outside the horizon drop out
+            frame = forecast.set_index("ds").reindex(dates)
+            yhat[position[product]] = frame["yhat"].fillna(0).to_numpy()
+            spread = (frame["yhat_upper"] - frame["yhat_lower"]) / (2 * PROPHET_INTERVAL_Z)
+            sigma[position[product]] = spread.fillna(0).to_numpy()
+        done += len(prophet[i:i + PREWARM_BATCH_SIZE])
+        progress(done)
+    return products, dates, yhat, sigma
+
+def _check_hierarchy(source_system, level):
+    if source_system not in SOURCE_FILE_MAP:
+        raise ValueError(f"Unknown source system: {source_system}")
+    if level != TOTAL_LEVEL and level not in HIERARCHY_LEVELS:
+        raise ValueError(f"Unknown hierarchy level: {level}")
+    if level != TOTAL_LEVEL and source_system not in LOCATION_FILE_MAP:
+        raise ValueError(f"No location data for source system: {source_system}")
+
+def get_hierarchy_forecast(source_system, level=TOTAL_LEVEL, engine="fast", progress=None):
+    """
+    30-day forecasts for the whole source, or per brand or state, reconciled bottom-up from the
+    product forecasts: no aggregate is fitted separately. Brand and state splits use each
+    product's recent share of orders in the source's location dataset. With the Prophet engine
+    every product may need fitting, so callers should run it through submit_hierarchy_job.
+    """
+    _check_hierarchy(source_system, level)
+    products, dates, yhat, sigma = _horizon_forecasts(source_system, engine, progress or (lambda done, total=None: None))
+    if level == TOTAL_LEVEL:
+        groups, weights = ["Total"], np.ones((1, len(products)))
+    else:
+        location = get_dataset(LOCATION_FILE_MAP[source_system], read_location)
+        groups, weights = share_matrix(location, products, HIERARCHY_LEVELS[level])
+
+    mean, lower, upper = reconcile(yhat, sigma, weights)
+    return {
+        "level": level,
+        "engine": engine,
+        "groups": [
+            {
+                "name": group,
+                "total_forecast": round(float(mean[g].sum()), 2),
+                "forecast_data": pd.DataFrame({
+                    "ds": dates, "yhat": mean[g], "yhat_lower": lower[g], "yhat_upper": upper[g]
+                }).to_dict(orient="records")
+            }
+            for g, group in enumerate(groups)
+        ]
+    }
+
+# ---------- BACKGROUND JOBS ----------
+def _forecast_products(source_system, products, engine, progress):
+    """Compute (and cache) forecasts for `products`, every product if None, reporting progress per batch."""
+    if engine == "fast":
+        forecasts = fast_forecasts(source_system)
+        products = list(forecasts.products) if products is None else products
+        progress(len(products), len(products))
+        return {"products": [product for product in products if product in forecasts]}
+
+    forecasts = lazy_forecasts(source_system)
+    products = list(forecasts.index.products) if products is None else products
+    unknown = [product for product in products if product not in forecasts.tier]
+    known = [product for product in products if product in forecasts.tier]
+    prophet = [product for product in known if forecasts.tier[product] == PROPHET_TIER]
+    progress(0, len(known))
+
+    # One lookup per vectorised tier computes the whole tier
+    for tier in VECTORISED_TIERS:
+        members = [product for product in known if forecasts.tier[product] == tier]
+        if members:
+            forecasts.get(members[0])
+    done = len(known) - len(prophet)
+    progress(done)
+    for i in range(0, len(prophet), PREWARM_BATCH_SIZE):
+        batch = prophet[i:i + PREWARM_BATCH_SIZE]
+        forecasts.fit(batch)
+        done += len(batch)
+        progress(done)
+    return {"products": known, "unknown": unknown}
+
+def submit_forecast_job(source_system, product=None, products=None, engine="prophet"):
+    """
+    Queue forecast work and return its Job.
+
+    With `product` the job's result is that product's detail payload; otherwise it forecasts
+    `products` (or the whole source) into the cache, from where /forecast/detail serves them.
+    """
+    if source_system not in SOURCE_FILE_MAP:
+        raise ValueError(f"Unknown source system: {source_system}")
+    if product is not None:
+        return forecast_jobs.submit(
+            lambda progress: _detail_job(source_system, product, engine, progress),
+            key=("detail", source_system, product, engine)
+        )
+    return forecast_jobs.submit(
+        lambda progress: _forecast_products(source_system, products, engine, progress),
+        key=("batch", source_system, tuple(products) if products is not None else None, engine)
+    )
+
+def submit_hierarchy_job(source_system, level=TOTAL_LEVEL, engine="prophet"):
+    """Queue a hierarchy roll-up; its result is the get_hierarchy_forecast payload."""
+    _check_hierarchy(source_system, level)
+    return forecast_jobs.submit(
+        lambda progress: get_hierarchy_forecast(source_system, level, engine, progress),
+        key=("hierarchy", source_system, level, engine)
+    )
+
+def _detail_job(source_system, product, engine, progress):
+    progress(0, 1)
+    result = get_forecast_detail(source_system, product, engine)
+    progress(1)
+    return result
+
+def get_forecast_job(job_id):
+    return forecast_jobs.get(job_id)
@@ -0,0 +1,291 @@
+# fast_forecast.py
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from timeseries_store import open_store
+
+# ---------- CONFIG ----------
+HORIZON_DAYS = 30
+# Models see each product's trailing year; older history barely moves a smoothed level
+HISTORY_DAYS = 365
+# 95% prediction intervals
+INTERVAL_Z = 1.96
+# Smoothing parameter grids, searched per product by one-step-ahead squared error.
+# Holt uses the error-correction form (b += beta * error), so beta <= alpha keeps it stable.
+SES_ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9)
+HOLT_PARAMS = tuple((a, b) for a in (0.1, 0.2, 0.3, 0.5) for b in (0.01, 0.05, 0.1) if b <= a)
+# Croston smoothing for demand sizes and intervals; low values suit sparse, noisy demand
+CROSTON_ALPHA = 0.1
+# TSB updates its demand probability every day, so it decays towards zero through a silence
+TSB_BETA = 0.05
+AUTO_MODELS = ("ses", "holt", "linear")
+FAST_MODELS = ("auto",) + AUTO_MODELS + ("croston", "tsb", "zero")
+
+_forecasts = {}
+_forecasts_lock = threading.Lock()
+
+
+# ---------- MODELS ----------
+def exponential_smoothing(Y, start, alpha, beta):
+    """
+    Additive exponential smoothing for G parameter sets over P series in one pass over time.
+
+    Y is (P, T) and series p starts at column start[p]; alpha/beta are (G,) with beta 0 for
+    simple smoothing. Returns level, trend and the one-step-ahead SSE, each (G, P), plus the
+    number of one-step errors per series.
+    """
+    n_series, n_days = Y.shape
+    a = np.asarray(alpha, dtype=np.float64)[:, None]
+    b = np.asarray(beta, dtype=np.float64)[:, None]
+    level = np.zeros((len(a), n_series))
+    trend = np.zeros((len(a), n_series))
+    sse = np.zeros((len(a), n_series))
+
+    for t in range(n_days):
+        y = Y[:, t]
+        err = np.where(start < t, y - level - trend, 0.0)
+        sse += err * err
+        level = np.where(start == t, y, level + trend + a * err)
+        trend = trend + b * err
+
+    count = np.maximum(n_days - 1 - start, 0)
+    return level, trend, sse, count
+
+
+def _smoothing_forecast(Y, start, params, horizon):
+    """Best parameter set per series from `params`, and its forecast mean and variance."""
+    alpha = np.array([p[0] for p in params])
+    beta = np.array([p[1] for p in params])
+    level, trend, sse, count = exponential_smoothing(Y, start, alpha, beta)
+    best = np.argmin(sse, axis=0)
+    cols = np.arange(Y.shape[0])
+    level, trend, sse = level[best, cols], trend[best, cols], sse[best, cols]
+    a, b = alpha[best][:, None], beta[best][:, None]
+
+    h = np.arange(1, horizon + 1)[None, :]
+    sigma2 = (sse / np.maximum(count, 1))[:, None]
+    mean = level[:, None] + trend[:, None] * h
+    # ETS(A,A,N) h-step variance; beta = 0 reduces it to simple smoothing's 1 + (h-1)alpha^2
+    var = sigma2 * (1 + (h - 1) * (a ** 2 + a * b * h + b ** 2 * h * (2 * h - 1) / 6))
+    return mean, var
+
+
+def _linear_forecast(Y, start, horizon):
+    """Least-squares line through each series' observed days, extended `horizon` days."""
+    n_days = Y.shape[1]
+    x = np.arange(n_days)[None, :] - start[:, None]
+    observed = x >= 0
+    x = np.where(observed, x, 0).astype(np.float64)
+    y = np.where(observed, Y, 0.0)
+
+    n = observed.sum(axis=1).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x = x.sum(axis=1) / n
+        mean_y = y.sum(axis=1) / n
+        xc = np.where(observed, x - mean_x[:, None], 0.0)
+        sxx = (xc * xc).sum(axis=1)
+        slope = np.where(sxx > 0, (xc * (y - mean_y[:, None])).sum(axis=1) / sxx, 0.0)
+        intercept = mean_y - slope * mean_x
+        resid = np.where(observed, y - intercept[:, None] - slope[:, None] * x, 0.0)
+        sigma2 = np.where(n > 2, (resid * resid).sum(axis=1) / (n - 2), 0.0)
+
+        future_x = (n - 1)[:, None] + np.arange(1, horizon + 1)[None, :]
+        mean = intercept[:, None] + slope[:, None] * future_x
+        var = sigma2[:, None] * (1 + 1 / n[:, None] + (future_x - mean_x[:, None]) ** 2 / np.where(sxx > 0, sxx, 1)[:, None])
+    return np.nan_to_num(mean), np.nan_to_num(var)
+
+
+def _croston_forecast(Y, start, horizon, alpha=CROSTON_ALPHA):
+    """
+    Croston's method with the Syntetos-Boylan bias correction, for intermittent demand.
+
+    Non-zero order sizes and the gaps between them are smoothed separately; the forecast is a
+    flat daily rate (1 - alpha/2) * size / interval. The variance is the one-step error of
+    that rate over the days after the first order.
+    """
+    n_series, n_days = Y.shape
+    size = np.zeros(n_series)
+    interval = np.zeros(n_series)
+    gap = np.zeros(n_series)
+    seen = np.zeros(n_series, dtype=bool)
+    sse = np.zeros(n_series)
+    count = np.zeros(n_series)
+    correction = 1 - alpha / 2
+
+    for t in range(n_days):
+        y = Y[:, t]
+        active = start <= t
+        scored = active & seen
+        err = np.where(scored, y - correction * size / np.where(interval > 0, interval, 1), 0.0)
+        sse += err * err
+        count += scored
+
+        gap = np.where(active, gap + 1, gap)
+        demand = active & (y > 0)
+        first = demand & ~seen
+        size = np.where(first, y, np.where(demand, size + alpha * (y - size), size))
+        interval = np.where(first, gap, np.where(demand, interval + alpha * (gap - interval), interval))
+        gap = np.where(demand, 0, gap)
+        seen |= demand
+
+    rate = np.where(seen, correction * size / np.where(interval > 0, interval, 1), 0.0)
+    mean = np.repeat(rate[:, None], horizon, axis=1)
+    var = np.repeat((sse / np.maximum(count, 1))[:, None], horizon, axis=1)
+    return mean, var
+
+
+def _tsb_forecast(Y, start, horizon, alpha=CROSTON_ALPHA, beta=TSB_BETA):
+    """
+    Teunter-Syntetos-Babai: Croston with the interval replaced by a demand probability.
+
+    Order sizes are smoothed on days with demand, but the probability of demand is smoothed
+    every day, so a product that stops selling forecasts a rate decaying to zero instead of
+    its last one. The forecast is the flat daily rate probability * size.
+    """
+    n_series, n_days = Y.shape
+    size = np.zeros(n_series)
+    probability = np.zeros(n_series)
+    seen = np.zeros(n_series, dtype=bool)
+    sse = np.zeros(n_series)
+    count = np.zeros(n_series)
+
+    for t in range(n_days):
+        y = Y[:, t]
+        active = start <= t
+        scored = active & seen
+        err = np.where(scored, y - probability * size, 0.0)
+        sse += err * err
+        count += scored
+
+        demand = active & (y > 0)
+        first = demand & ~seen
+        # The first order seeds the probability with one order over the days waited for it
+        probability = np.where(first, 1.0 / (t - start + 1),
+                               np.where(scored, probability + beta * (demand - probability), probability))
+        size = np.where(first, y, np.where(demand, size + alpha * (y - size), size))
+        seen |= demand
+
+    mean = np.repeat((probability * size)[:, None], horizon, axis=1)
+    var = np.repeat((sse / np.maximum(count, 1))[:, None], horizon, axis=1)
+    return mean, var
+
+
+def _zero_forecast(Y, start, horizon):
+    """No demand expected: for products that have stopped selling."""
+    zeros = np.zeros((Y.shape[0], horizon))
+    return zeros, zeros
+
+
+_MODELS = {
+    "ses": lambda Y, start, horizon: _smoothing_forecast(Y, start, [(a, 0.0) for a in SES_ALPHAS], horizon),
+    "holt": lambda Y, start, horizon: _smoothing_forecast(Y, start, HOLT_PARAMS, horizon),
+    "linear": _linear_forecast,
+    "croston": _croston_forecast,
+    "tsb": _tsb_forecast,
+    "zero": _zero_forecast
+}
+
+
+def _model_forecasts(Y, start, horizon, names):
+    return {name: _MODELS[name](Y, start, horizon) for name in names}
+
+
+def forecast_matrix(Y, start, model="auto", horizon=HORIZON_DAYS):
+    """
+    Forecast every row of a (products x days) matrix `horizon` days ahead.
+
+    "auto" scores each model on the last `horizon` days held out and keeps, per product, the one
+    with the lowest absolute error before refitting it on the full history; products too short
+    to hold out use simple smoothing. Returns yhat, yhat_lower, yhat_upper, the forecast standard
+    deviation (before the bounds are clipped at zero) and the model names.
+    """
+    if model not in FAST_MODELS:
+        raise ValueError(f"Unknown fast forecast model: {model}")
+    Y = np.asarray(Y, dtype=np.float64)
+    start = np.asarray(start, dtype=np.int64)
+    names = AUTO_MODELS if model == "auto" else (model,)
+    fitted = _model_forecasts(Y, start, horizon, names)
+
+    if model == "auto" and Y.shape[1] > horizon:
+        train, actual = Y[:, :-horizon], Y[:, -horizon:]
+        held_out = _model_forecasts(train, start, horizon, names)
+        errors = np.stack([np.abs(held_out[name][0] - actual).mean(axis=1) for name in names])
+        choice = np.argmin(errors, axis=0)
+        choice[start + 2 * horizon > Y.shape[1]] = 0
+    else:
+        choice = np.zeros(Y.shape[0], dtype=np.int64)
+
+    mean = np.choose(choice[:, None], [fitted[name][0] for name in names])
+    var = np.choose(choice[:, None], [fitted[name][1] for name in names])
+    sigma = np.sqrt(var)
+    spread = INTERVAL_Z * sigma
+    return (
+        np.maximum(mean, 0.0),
+        np.maximum(mean - spread, 0.0),
+        np.maximum(mean + spread, 0.0),
+        sigma,
+        np.array(names)[choice]
+    )
+
+
+# ---------- SOURCES ----------
+class FastForecast:
+    """Forecasts for every product of one source, as (products x horizon) arrays."""
+
+    def __init__(self, products, dates, yhat, yhat_lower, yhat_upper, sigma, models):
+        self.products = products
+        self.dates = dates
+        self.yhat, self.yhat_lower, self.yhat_upper = yhat, yhat_lower, yhat_upper
+        # Unclipped standard deviation behind the bounds, for summing variances across products
+        self.sigma = sigma
+        self.models = models
+        self._position = {product: i for i, product in enumerate(products)}
+
+    def __contains__(self, product):
+        return product in self._position
+
+    def model(self, product):
+        return str(self.models[self._position[product]])
+
+    def frame(self, product):
+        """Same columns as the Prophet forecasts: ds, yhat, yhat_lower, yhat_upper, product_name."""
+        i = self._position[product]
+        return pd.DataFrame({
+            "ds": self.dates,
+            "yhat": self.yhat[i],
+            "yhat_lower": self.yhat_lower[i],
+            "yhat_upper": self.yhat_upper[i],
+            "product_name": product
+        })
+
+
+def forecast_store(store, model="auto", horizon=HORIZON_DAYS, history_days=HISTORY_DAYS, products=None):
+    """Forecast every product in a TimeSeriesStore (or just `products`) from the day after its last date."""
+    block, dates = store.window(store.dates[-1] - pd.Timedelta(days=history_days - 1), None)
+    lo = len(store.dates) - len(dates)
+    start = np.maximum(store.first_day - lo, 0)
+    if products is not None:
+        rows = np.array([store.position(p) for p in products], dtype=np.int64)
+        block, start = block[rows], start[rows]
+    else:
+        products = store.products
+    yhat, lower, upper, sigma, models = forecast_matrix(block, start, model, horizon)
+    future = pd.date_range(dates[-1] + pd.Timedelta(days=1), periods=horizon, freq="D", name="ds")
+    return FastForecast(products, future, yhat, lower, upper, sigma, models)
+
+
+def get_fast_forecast(path, model="auto"):
+    """Fast forecasts for a daily source file, recomputed only when its data version changes."""
+    store = open_store(path)
+    key = (os.path.abspath(path), model)
+    with _forecasts_lock:
+        cached = _forecasts.get(key)
+        if cached is not None and cached[0] == store.version:
+            return cached[1]
+    result = forecast_store(store, model)
+    with _forecasts_lock:
+        _forecasts[key] = (store.version, result)
+    return result
@@ -0,0 +1,58 @@
+# forecast_hierarchy.py
+import numpy as np
+import pandas as pd
+
+from fast_forecast import INTERVAL_Z
+
+# ---------- CONFIG ----------
+# Aggregation levels over the PRODUCT / BRAND / STATE_NAME columns of the location datasets
+TOTAL_LEVEL = "total"
+HIERARCHY_LEVELS = {"brand": "BRAND", "state": "STATE_NAME"}
+# Products are split across brands/states by their share of orders over these trailing months
+SHARE_MONTHS = 12
+UNMAPPED = "Unmapped"
+
+
+def read_location(path):
+    df = pd.read_csv(path)
+    df["CREATED_MONTH"] = pd.to_datetime(df["CREATED_MONTH"])
+    return df
+
+
+def share_matrix(location, products, column, months=SHARE_MONTHS):
+    """
+    Group names and a (groups x products) weight matrix for one hierarchy column.
+
+    W[g, p] is the share of product p's orders that fell in group g over the last `months`
+    months, so every column sums to 1 and a product's forecast is split, not duplicated.
+    Products with no recent orders in the location data go wholly to UNMAPPED.
+    """
+    recent = location[location["CREATED_MONTH"] > location["CREATED_MONTH"].max() - pd.DateOffset(months=months)]
+    orders = (
+        recent.groupby([column, "PRODUCT"])["Total_orders"].sum()
+        .unstack(fill_value=0)
+        .reindex(columns=products, fill_value=0)
+    )
+    weights = orders.to_numpy(dtype=np.float64)
+    totals = weights.sum(axis=0)
+    weights = weights / np.where(totals > 0, totals, 1)
+    groups = [str(g) for g in orders.index]
+
+    unmapped = totals <= 0
+    if unmapped.any():
+        weights = np.vstack([weights, unmapped.astype(np.float64)])
+        groups.append(UNMAPPED)
+    return groups, weights
+
+
+def reconcile(yhat, sigma, weights):
+    """
+    Bottom-up aggregate forecasts: W @ yhat for the mean and W² @ σ² for the variance.
+
+    Product errors are treated as independent, so an aggregate's standard deviation is the
+    square root of its weighted sum of product variances. Returns mean, lower and upper
+    bounds of the INTERVAL_Z interval, each (groups x horizon).
+    """
+    mean = weights @ yhat
+    spread = INTERVAL_Z * np.sqrt((weights ** 2) @ (sigma ** 2))
+    return mean, np.maximum(mean - spread, 0.0), mean + spread
@@ -0,0 +1,75 @@
+# forecast_router.py
+import os
+
+import numpy as np
+import pandas as pd
+
+# ---------- CONFIG ----------
+# Tiers from cheapest to most expensive; each maps to one forecasting method
+INACTIVE_TIER = "inactive"          # zero forecast
+INTERMITTENT_TIER = "intermittent"  # TSB (Croston with a decaying demand probability)
+SMOOTHING_TIER = "smoothing"        # vectorised SES/Holt/linear
+PROPHET_TIER = "prophet"
+TIERS = (INACTIVE_TIER, INTERMITTENT_TIER, SMOOTHING_TIER, PROPHET_TIER)
+# Tiers forecast for all their products at once by fast_forecast
+VECTORISED_TIERS = (INACTIVE_TIER, INTERMITTENT_TIER, SMOOTHING_TIER)
+
+# Cluster_classification values written by n8n/classification
+PROPHET_CLASSES = {"High-Moving"}
+INTERMITTENT_CLASSES = {"Very-Low-Moving"}
+INACTIVE_CLASSES = {"Obsolete"}
+# Syntetos-Boylan cut-off: more than 1.32 days between orders on average is intermittent demand
+INTERMITTENT_ADI = 1.32
+# Products without an order in this many trailing days of the source are treated as stopped
+INACTIVE_DAYS = 90
+
+
+def load_velocity_classes(path):
+    """product -> Cluster_classification from a product_classification_<source>.csv, or {} if absent."""
+    if path is None or not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path, usecols=["product", "Cluster_classification"]).dropna()
+    return dict(zip(df["product"], df["Cluster_classification"]))
+
+
+def demand_intervals(store):
+    """
+    Average days between orders (ADI) per product, from its first order to the source's last
+    date, so a product that stopped selling months ago counts its silence as well.
+    """
+    span = len(store.dates) - np.asarray(store.first_day)
+    nonzero = np.count_nonzero(np.asarray(store.matrix) > 0, axis=1)
+    with np.errstate(divide="ignore"):
+        return np.where(nonzero > 0, span / nonzero, np.inf)
+
+
+def days_since_demand(store):
+    """Days from each product's last order to the source's last date; inf if it never sold."""
+    ordered = np.asarray(store.matrix) > 0
+    last = ordered.shape[1] - 1 - np.argmax(ordered[:, ::-1], axis=1)
+    return np.where(ordered.any(axis=1), len(store.dates) - 1 - last, np.inf)
+
+
+def route_products(store, sufficient, classes):
+    """
+    Tier for every product of a TimeSeriesStore, as {tier: [products]}.
+
+    Obsolete products and ones with no orders in the last INACTIVE_DAYS get a zero forecast.
+    Intermittent series (by class or ADI) go to TSB whatever their volume. Of the rest, only
+    products with enough history for Prophet that are classed High-Moving, or have no class at
+    all, are fitted with Prophet; everything else is smoothed.
+    """
+    adi = demand_intervals(store)
+    silent = days_since_demand(store)
+    tiers = {tier: [] for tier in TIERS}
+    for product, enough, interval, idle in zip(store.products, sufficient, adi, silent):
+        velocity = classes.get(product)
+        if velocity in INACTIVE_CLASSES or idle >= INACTIVE_DAYS:
+            tiers[INACTIVE_TIER].append(product)
+        elif velocity in INTERMITTENT_CLASSES or interval > INTERMITTENT_ADI:
+            tiers[INTERMITTENT_TIER].append(product)
+        elif enough and (velocity is None or velocity in PROPHET_CLASSES):
+            tiers[PROPHET_TIER].append(product)
+        else:
+            tiers[SMOOTHING_TIER].append(product)
+    return tiers
@@ -0,0 +1,133 @@
+# ingest_cache.py
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+# ---------- CONFIG ----------
+# Converted copies live next to the source workbook, e.g. data/.ingest_cache/sorted_file_eon.parquet
+CACHE_DIR_NAME = ".ingest_cache"
+HASH_CHUNK_SIZE = 1 << 20
+
+# ---------- FINGERPRINTS ----------
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def source_fingerprint(path):
+    """Cheap stat-based fingerprint; the content hash is only computed when this changes."""
+    st = os.stat(path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+def cache_path(path, suffix):
+    directory, name = os.path.split(os.path.abspath(path))
+    stem = os.path.splitext(name)[0]
+    return os.path.join(directory, CACHE_DIR_NAME, f"{stem}{suffix}")
+
+def _read_meta(path):
+    meta_file = cache_path(path, ".meta.json")
+    if not os.path.exists(meta_file):
+        return None
+    try:
+        with open(meta_file, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_json_atomic(target, payload):
+    # A unique temp file per call: request threads of one process may write the same meta at once
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(payload, f, indent=2)
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def source_version(path):
+    """Content hash of the source file, reusing the cached one while mtime/size are unchanged."""
+    meta = _read_meta(path)
+    stat = source_fingerprint(path)
+    if meta and meta.get("mtime_ns") == stat["mtime_ns"] and meta.get("size") == stat["size"]:
+        return meta["sha1"]
+    digest = file_digest(path)
+    if meta and meta.get("sha1") == digest:
+        # Touched but not modified: refresh the stat fields so the next call skips the hash
+        meta.update(stat)
+        _write_json_atomic(cache_path(path, ".meta.json"), meta)
+    return digest
+
+# ---------- CONVERSION ----------
+def _read_source(path, date_columns):
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path)
+    else:
+        df = pd.read_excel(path)
+    for col in date_columns:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+def _is_fresh(meta, stat, date_columns):
+    return (
+        meta is not None
+        and meta.get("mtime_ns") == stat["mtime_ns"]
+        and meta.get("size") == stat["size"]
+        and meta.get("date_columns") == list(date_columns)
+    )
+
+def read_excel_cached(path, date_columns=()):
+    """
+    Read a source workbook through a typed Parquet copy.
+
+    The workbook is parsed once with the given date columns converted; later calls read
+    the Parquet file instead. The copy is rebuilt when the workbook's mtime/size change and
+    its content hash no longer matches. Without a Parquet engine this falls back to a plain read.
+    """
+    date_columns = list(date_columns)
+    parquet_file = cache_path(path, ".parquet")
+    meta_file = cache_path(path, ".meta.json")
+    stat = source_fingerprint(path)
+    meta = _read_meta(path)
+
+    if _is_fresh(meta, stat, date_columns) and os.path.exists(parquet_file):
+        return pd.read_parquet(parquet_file)
+
+    digest = file_digest(path)
+    if (
+        meta is not None
+        and meta.get("sha1") == digest
+        and meta.get("date_columns") == date_columns
+        and os.path.exists(parquet_file)
+    ):
+        # Touched but not modified: refresh the stat fields and keep the converted copy
+        meta.update(stat)
+        _write_json_atomic(meta_file, meta)
+        return pd.read_parquet(parquet_file)
+
+    df = _read_source(path, date_columns)
+    os.makedirs(os.path.dirname(parquet_file), exist_ok=True)
+    tmp = f"{parquet_file}.tmp.{os.getpid()}"
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, parquet_file)
+    except (ImportError, ValueError, TypeError):
+        # No Parquet engine, or mixed-type columns Arrow cannot type: serve the parsed frame as-is
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return df
+
+    _write_json_atomic(meta_file, {
+        "source": os.path.abspath(path),
+        "sha1": digest,
+        "date_columns": date_columns,
+        "rows": len(df),
+        **stat
+    })
+    return df
@@ -0,0 +1,109 @@
+# job_queue.py
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------- CONFIG ----------
+# Finished jobs (and their results) are kept this long for polling, then dropped
+JOB_TTL_SECONDS = 3600
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job:
+    """One submitted unit of work; `done`/`total` are the progress its function last reported."""
+
+    def __init__(self, key=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.done = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobQueue:
+    """
+    Background jobs run by a fixed pool of worker threads.
+
+    `submit(fn)` queues `fn(progress)` and returns its Job at once; `fn` may call
+    `progress(done, total)` as it goes. Submitting with the `key` of a job that is still queued
+    or running returns that job instead of queueing the same work twice.
+    """
+
+    def __init__(self, workers, ttl=JOB_TTL_SECONDS):
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, key=None):
+        with self._lock:
+            self._prune()
+            if key is not None and key in self._active:
+                return self._active[key]
+            job = Job(key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active[key] = job
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        job.status = RUNNING
+        job.started_at = time.time()
+
+        def progress(done, total=None):
+            job.done = done
+            if total is not None:
+                job.total = total
+
+        try:
+            result, error, status = fn(progress), None, DONE
+        except Exception as e:
+            result, error, status = None, str(e), FAILED
+        with self._lock:
+            # finished_at is set before the status flips, so _prune never sees a finished job without it
+            job.result, job.error = result, error
+            job.finished_at = time.time()
+            job.status = status
+            if job.key is not None and self._active.get(job.key) is job:
+                del self._active[job.key]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.finished and j.finished_at is not None and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
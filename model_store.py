@@ -0,0 +1,82 @@
+# model_store.py
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+from prophet.serialize import model_from_json, model_to_json
+
+# ---------- FINGERPRINTS ----------
+def series_hash(df_prod):
+    """Content hash of a product's training series (ds, y); any edited, added or removed day changes it."""
+    h = hashlib.sha1()
+    h.update(df_prod["ds"].to_numpy(dtype="datetime64[ns]").astype(np.int64).tobytes())
+    h.update(df_prod["y"].to_numpy(dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def warm_start_params(model):
+    """
+    A fitted model's parameters in the form Prophet.fit(init=...) expects, so a refit on a
+    slightly longer series starts its optimiser next to the previous optimum.
+    """
+    params = {}
+    for name in ("k", "m", "sigma_obs"):
+        params[name] = model.params[name][0][0] if model.mcmc_samples == 0 else np.mean(model.params[name])
+    for name in ("delta", "beta"):
+        params[name] = model.params[name][0] if model.mcmc_samples == 0 else np.mean(model.params[name], axis=0)
+    return params
+
+
+# ---------- STORE ----------
+class ModelStore:
+    """
+    Fitted Prophet models on disk, one JSON file per (source, product).
+
+    Each file records the series_hash of the data the model was fitted on; `load` only returns
+    a model when that hash matches, so callers refit exactly when a product's history changes.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, source_system, product):
+        # Product names are free text; the file name is a hash of the name so it is always safe
+        name = hashlib.sha1(str(product).encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.root, source_system, f"{name}.json")
+
+    def read(self, source_system, product):
+        """(series_hash, model) of the last fit stored for `product`, or None."""
+        target = self.path(source_system, product)
+        if not os.path.exists(target):
+            return None
+        try:
+            with open(target, "r") as f:
+                entry = json.load(f)
+            if entry.get("product") != str(product):
+                return None
+            return entry["series_hash"], model_from_json(entry["model"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def load(self, source_system, product, digest):
+        """The stored model for `product` if it was fitted on a series with this hash, else None."""
+        stored = self.read(source_system, product)
+        if stored is None or stored[0] != digest:
+            return None
+        return stored[1]
+
+    def save(self, source_system, product, digest, model):
+        target = self.path(source_system, product)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Unique per call: concurrent request threads may save the same product
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"product": str(product), "series_hash": digest, "model": model_to_json(model)}, f)
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
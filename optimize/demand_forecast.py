@@ -3,6 +3,11 @@ import json
 from prophet import Prophet
 from datetime import timedelta
 import os
+from ingest_cache import read_excel_cached, source_version
+from dataset_registry import get_dataset, registry
+from product_index import ProductIndex, get_product_index
+from model_store import ModelStore, series_hash, warm_start_params
+from fast_forecast import get_fast_forecast
 
 # ---------- CONFIG ----------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -12,24 +17,78 @@ SOURCE_FILE_MAP = {
     "orion": os.path.join(BASE_DIR, "sorted_file_orion.xlsx"),
 }
 CACHE_DIR = os.path.join(BASE_DIR, "forecast_cache")
+MODEL_DIR = os.path.join(BASE_DIR, "model_store")
+# Written by `builder`: per-source forecast tables plus the data version each was built from
+MANIFEST_FILE = os.path.join(CACHE_DIR, "manifest.json")
+FORECAST_COLUMNS = ["ds", "yhat", "yhat_lower", "yhat_upper"]
+# "fast" forecasts every product at once with NumPy smoothing/linear models instead of Prophet
+FORECAST_ENGINES = ("prophet", "fast")
+
+model_store = ModelStore(MODEL_DIR)
 
 # ---------- LOAD DATA ----------
+def _read_daily(path):
+    return read_excel_cached(path, date_columns=["date"])
+
 def load_data(source_system):
     if source_system not in SOURCE_FILE_MAP:
         raise ValueError(f"Unknown source system: {source_system}")
     
-    df = pd.read_excel(SOURCE_FILE_MAP[source_system])
+    df = get_dataset(SOURCE_FILE_MAP[source_system], _read_daily)
     df.rename(columns={"date": "ds", "total_orders": "y", "product": "product_name"}, inplace=True)
-    df["ds"] = pd.to_datetime(df["ds"])
     return df
 
+def load_index(source_system):
+    if source_system not in SOURCE_FILE_MAP:
+        raise ValueError(f"Unknown source system: {source_system}")
+    return get_product_index(SOURCE_FILE_MAP[source_system], _read_daily)
+
+def product_series(index, product):
+    return index.rows(product)[["date", "total_orders"]].rename(columns={"date": "ds", "total_orders": "y"})
+
 # ---------- HELPER FUNCTION TO CHECK DATA SUFFICIENCY ----------
 def has_sufficient_data(df_prod):
     return df_prod.shape[0] >= 60 and df_prod["y"].sum() >= 10
 
+# ---------- MATERIALISED FORECASTS ----------
+def forecast_file(source_system):
+    return os.path.join(CACHE_DIR, f"forecast_{source_system}.parquet")
+
+def read_manifest():
+    if not os.path.exists(MANIFEST_FILE):
+        return {}
+    with open(MANIFEST_FILE, "r") as f:
+        return json.load(f)
+
+def _forecast_index(df):
+    return ProductIndex(df, date_col="ds")
+
+def load_forecast_index(source_system):
+    """Builder output for a source, or None when it is missing or was built from older data."""
+    if source_system not in SOURCE_FILE_MAP:
+        raise ValueError(f"Unknown source system: {source_system}")
+    path = forecast_file(source_system)
+    entry = read_manifest().get(source_system)
+    if not os.path.exists(path) or entry is None:
+        return None
+    if entry.get("data_version") != source_version(SOURCE_FILE_MAP[source_system]):
+        return None
+    return registry.derived(path, pd.read_parquet, "forecast_index", _forecast_index)
+
 # ---------- FAST SUMMARY FROM CACHE ----------
-def get_forecast_summary(source_system):
-    """Read valid product list from cached JSON file"""
+def fast_forecasts(source_system):
+    if source_system not in SOURCE_FILE_MAP:
+        raise ValueError(f"Unknown source system: {source_system}")
+    return get_fast_forecast(SOURCE_FILE_MAP[source_system])
+
+def get_forecast_summary(source_system, engine="prophet"):
+    """Products with a materialised forecast, else the valid product list from the cached JSON file"""
+    if engine == "fast":
+        return sorted(fast_forecasts(source_system).products)
+    forecasts = load_forecast_index(source_system)
+    if forecasts is not None:
+        return list(forecasts.products)
+
     cache_path = os.path.join(CACHE_DIR, f"forecast_cache_{source_system}.json")
     if not os.path.exists(cache_path):
         raise FileNotFoundError(f"Cached product list not found for: {source_system}")
@@ -40,36 +99,75 @@ def get_forecast_summary(source_system):
     return cached_data.get("products", [])
 
 # ---------- DETAILED FORECAST (PER PRODUCT) ----------
-def get_forecast_detail(source_system, product):
-    df = load_data(source_system)
-    df_prod = df[df["product_name"] == product][["ds", "y"]].copy()
+def _fit_model(df_prod, previous=None):
+    model = Prophet(daily_seasonality=True, yearly_seasonality=True)
+    if previous is None:
+        return model.fit(df_prod)
+    try:
+        return model.fit(df_prod, init=warm_start_params(previous))
+    except Exception:
+        # Parameter shapes no longer line up (e.g. different changepoints): fit from scratch
+        return _fit_model(df_prod)
 
-    if has_sufficient_data(df_prod):
-        model = Prophet(daily_seasonality=True, yearly_seasonality=True)
-        model.fit(df_prod)
+def forecast_product(source_system, product, df_prod, digest=None, warm_start=True):
+    """
+    The next 30 days of yhat/yhat_lower/yhat_upper for one product, clipped at zero.
 
-        future = model.make_future_dataframe(periods=30)
-        forecast = model.predict(future)
-        forecast["yhat"] = forecast["yhat"].clip(lower=0)
-        forecast["yhat_lower"] = forecast["yhat_lower"].clip(lower=0)
-        forecast["yhat_upper"] = forecast["yhat_upper"].clip(lower=0)
+    The stored fit is reused while the product's series is unchanged. When it changed, the refit
+    is seeded with the stored model's parameters unless warm_start is False.
+    """
+    digest = digest or series_hash(df_prod)
+    stored = model_store.read(source_system, product)
+    if stored is not None and stored[0] == digest:
+        model = stored[1]
+    else:
+        model = _fit_model(df_prod, stored[1] if warm_start and stored is not None else None)
+        model_store.save(source_system, product, digest, model)
 
-        forecast = forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].copy()
-        latest_cutoff = forecast["ds"].max() - timedelta(days=29)
-        df_selected = forecast[forecast["ds"] >= latest_cutoff]
+    future = model.make_future_dataframe(periods=30)
+    forecast = model.predict(future)
+    forecast["yhat"] = forecast["yhat"].clip(lower=0)
+    forecast["yhat_lower"] = forecast["yhat_lower"].clip(lower=0)
+    forecast["yhat_upper"] = forecast["yhat_upper"].clip(lower=0)
 
+    forecast = forecast[FORECAST_COLUMNS].copy()
+    latest_cutoff = forecast["ds"].max() - timedelta(days=29)
+    return forecast[forecast["ds"] >= latest_cutoff]
+
+def get_forecast_detail(source_system, product, engine="prophet"):
+    if engine == "fast":
+        forecasts = fast_forecasts(source_system)
+        if product not in forecasts:
+            return None
+        df_selected = forecasts.frame(product)[FORECAST_COLUMNS]
         return {
             "product": product,
             "total_forecast": round(df_selected["yhat"].sum(), 2),
             "forecast_data": df_selected.to_dict(orient="records")
         }
-    
-    return None
+
+    forecasts = load_forecast_index(source_system)
+    if forecasts is not None:
+        # Products the builder skipped had insufficient data
+        if product not in forecasts:
+            return None
+        df_selected = forecasts.rows(product)[FORECAST_COLUMNS]
+    else:
+        df_prod = product_series(load_index(source_system), product)
+        if not has_sufficient_data(df_prod):
+            return None
+        df_selected = forecast_product(source_system, product, df_prod)
+
+    return {
+        "product": product,
+        "total_forecast": round(df_selected["yhat"].sum(), 2),
+        "forecast_data": df_selected.to_dict(orient="records")
+    }
 
 # ---------- OPTIONAL: GET DATA STATISTICS ----------
 def get_data_statistics(source_system):
-    df = load_data(source_system)
-    all_products = df['product_name'].unique()
+    index = load_index(source_system)
+    all_products = index.products
     
     stats = {
         "total_products": len(all_products),
@@ -79,7 +177,7 @@ def get_data_statistics(source_system):
     }
 
     for product in all_products:
-        df_prod = df[df["product_name"] == product][["ds", "y"]].copy()
+        df_prod = product_series(index, product)
         row_count = df_prod.shape[0]
         total_orders = df_prod["y"].sum()
         sufficient = has_sufficient_data(df_prod)
@@ -1,23 +1,15 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from datetime import timedelta
 
 # Import all logic modules
-from trend_analysis import generate_summary, generate_detail, get_valid_sources
-from demand_forecast import get_forecast_summary, get_forecast_detail
-from product_bundles import get_product_bundles, get_recommendations
+from trend_analysis import generate_summary_page, generate_detail, get_valid_sources, load_trend_tables, TIME_RANGE_MAP, SUMMARY_SORT_FIELDS, DETAIL_GRANULARITIES
+from demand_forecast import get_forecast_summary, get_forecast_detail, FORECAST_ENGINES
+from product_bundles import get_product_bundles, get_recommendations, MINING_ENGINES, DEFAULT_MINING_ENGINE
+from dataset_registry import registry
 
 # Initialize app
 app = Flask(__name__)
-CORS(app)
-
-# Time range mapping
-TIME_RANGE_MAP = {
-    "1w": timedelta(weeks=1),
-    "1m": timedelta(days=30),
-    "1y": timedelta(days=365),
-    "2y": timedelta(days=730)
-}
+CORS(app, expose_headers=["X-Total-Count"])
 
 ### ----- TREND ANALYSIS ROUTES ----- ###
 
@@ -30,9 +22,26 @@ def trend_summary():
     if not source or analysis_type != "trend_analysis":
         return jsonify({"error": "Missing or invalid parameters"}), 400
 
+    max_points = data.get("max_points")
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 3):
+        return jsonify({"error": "Invalid max_points"}), 400
+
+    search = data.get("search")
+    sort_by = data.get("sort_by", "trend_percent")
+    order = data.get("order", "desc")
+    offset = data.get("offset", 0)
+    limit = data.get("limit")
+    if sort_by not in SUMMARY_SORT_FIELDS or order not in ("asc", "desc"):
+        return jsonify({"error": "Invalid sort_by or order"}), 400
+    if not isinstance(offset, int) or offset < 0 or (limit is not None and (not isinstance(limit, int) or limit < 1)):
+        return jsonify({"error": "Invalid offset or limit"}), 400
+
     try:
-        result = generate_summary(source)
-        return jsonify(result)
+        page = generate_summary_page(source, max_points=max_points, search=search, sort_by=sort_by,
+                                     order=order, offset=offset, limit=limit)
+        response = jsonify(page["products"])
+        response.headers["X-Total-Count"] = str(page["total"])
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -51,8 +60,17 @@ def trend_detail():
     if time_range not in TIME_RANGE_MAP:
         return jsonify({"error": "Invalid time_range"}), 400
 
+    granularity = data.get("granularity", "day")
+    if granularity not in DETAIL_GRANULARITIES:
+        return jsonify({"error": "Invalid granularity"}), 400
+
+    max_points = data.get("max_points")
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 3):
+        return jsonify({"error": "Invalid max_points"}), 400
+
     try:
-        result = generate_detail(source, product, TIME_RANGE_MAP[time_range])
+        result = generate_detail(source, product, TIME_RANGE_MAP[time_range], max_points=max_points,
+                                 granularity=granularity)
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -63,6 +81,11 @@ def list_sources():
     return jsonify(get_valid_sources())
 
 
+@app.route("/datasets", methods=["GET"])
+def dataset_stats():
+    return jsonify(registry.stats())
+
+
 ### ----- DEMAND FORECASTING ROUTES ----- ###
 
 @app.route("/forecast/summary", methods=["POST"])
@@ -73,8 +96,12 @@ def forecast_summary():
     if not source:
         return jsonify({"error": "Missing source_system"}), 400
 
+    engine = data.get("engine", "prophet")
+    if engine not in FORECAST_ENGINES:
+        return jsonify({"error": "Invalid engine"}), 400
+
     try:
-        product_list = get_forecast_summary(source)
+        product_list = get_forecast_summary(source, engine=engine)
         return jsonify({"products": product_list})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -89,8 +116,12 @@ def forecast_detail():
     if not source or not product:
         return jsonify({"error": "Missing source_system or product"}), 400
 
+    engine = data.get("engine", "prophet")
+    if engine not in FORECAST_ENGINES:
+        return jsonify({"error": "Invalid engine"}), 400
+
     try:
-        forecast = get_forecast_detail(source, product)
+        forecast = get_forecast_detail(source, product, engine=engine)
         return jsonify(forecast)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -106,8 +137,12 @@ def fetch_bundles():
     if not source:
         return jsonify({"error": "Missing source_system"}), 400
 
+    engine = data.get("engine", DEFAULT_MINING_ENGINE)
+    if engine not in MINING_ENGINES:
+        return jsonify({"error": "Invalid engine"}), 400
+
     try:
-        bundles = get_product_bundles(source)
+        bundles = get_product_bundles(source, engine=engine)
         return jsonify({"bundles": bundles})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -121,8 +156,12 @@ def fetch_recommendations():
     if not source:
         return jsonify({"error": "Missing source_system"}), 400
 
+    engine = data.get("engine", DEFAULT_MINING_ENGINE)
+    if engine not in MINING_ENGINES:
+        return jsonify({"error": "Invalid engine"}), 400
+
     try:
-        recommendations = get_recommendations(source)
+        recommendations = get_recommendations(source, engine=engine)
         return jsonify({"recommendations": recommendations})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -130,4 +169,6 @@ def fetch_recommendations():
 
 ### ----- MAIN ----- ###
 if __name__ == "__main__":
+    load_trend_tables()
+    registry.start_watcher()
     app.run(debug=True, port=5000)
@@ -0,0 +1,60 @@
+# benchmark_miners.py
+# Times each mining engine on synthetic baskets and checks they find the same itemsets.
+# Usage: python benchmark_miners.py [transactions ...] [--items N] [--support S]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from product_bundles import MINING_ENGINES, get_encoded_transactions
+
+# ---------- CONFIG ----------
+DEFAULT_SIZES = [10_000, 100_000, 300_000]
+DEFAULT_ITEMS = 500
+DEFAULT_SUPPORT = 0.005
+MEAN_BASKET_SIZE = 4
+SEED = 42
+
+
+def synthetic_baskets(transactions, items, seed=SEED):
+    """Baskets with Zipf-like item popularity and Poisson sizes, like real order lines."""
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, items + 1)
+    popularity /= popularity.sum()
+    names = np.array([f"item{i}" for i in range(items)], dtype=object)
+    sizes = np.maximum(rng.poisson(MEAN_BASKET_SIZE, transactions), 1)
+    picks = rng.choice(items, size=sizes.sum(), p=popularity)
+    return pd.DataFrame({"Items Bought": [list(b) for b in np.split(names[picks], np.cumsum(sizes)[:-1])]})
+
+
+def _itemset_table(itemsets):
+    return dict(zip(itemsets["itemsets"], itemsets["support"].round(10)))
+
+
+def run(sizes, items, support):
+    for transactions in sizes:
+        df_encoded = get_encoded_transactions(synthetic_baskets(transactions, items), sparse_output=True)
+        results = {}
+        for engine, miner in MINING_ENGINES.items():
+            started = time.perf_counter()
+            itemsets = miner(df_encoded, min_support=support, use_colnames=True)
+            seconds = time.perf_counter() - started
+            results[engine] = _itemset_table(itemsets)
+            print(f"{transactions:>9,} transactions  {engine:<9} {seconds:8.2f}s  {len(itemsets):>6} itemsets")
+
+        reference = results["fpgrowth"]
+        for engine, table in results.items():
+            if table != reference:
+                print(f"⚠️ {engine} itemsets differ from fpgrowth at {transactions:,} transactions")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    items, support = DEFAULT_ITEMS, DEFAULT_SUPPORT
+    if "--items" in args:
+        items = int(args[args.index("--items") + 1])
+    if "--support" in args:
+        support = float(args[args.index("--support") + 1])
+    sizes = [int(a) for i, a in enumerate(args) if not a.startswith("--") and (i == 0 or not args[i - 1].startswith("--"))]
+    run(sizes or DEFAULT_SIZES, items, support)
@@ -1,8 +1,16 @@
 # product_bundles.py
+import math
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from mlxtend.preprocessing import TransactionEncoder
-from mlxtend.frequent_patterns import fpgrowth, association_rules
+from mlxtend.frequent_patterns import fpgrowth
 import os
+from itertools import chain, combinations
+from ingest_cache import read_excel_cached
+from dataset_registry import get_dataset, registry
+from bitmap_miner import eclat, itemset_counts
+from cooccurrence import cooccurrence_counts, pair_itemsets, pair_rules, triangle_items, itemset_rules
 
 # Source system to Excel file mapping
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -15,45 +23,267 @@ SOURCE_FILE_MAP = {
 CONFIDENCE_THRESHOLD = 0.6
 SUPPORT_THRESHOLD = 0.05
 
+# Frequent-itemset miners; both return mlxtend's (support, itemsets) frame
+MINING_ENGINES = {"fpgrowth": fpgrowth, "eclat": eclat}
+DEFAULT_MINING_ENGINE = "fpgrowth"
+
+# Mine only the orders appended since the last load, keeping counts between loads
+INCREMENTAL_MINING = True
+# Appended transaction blocks kept apart before they are merged into one matrix
+MAX_TRANSACTION_BLOCKS = 16
+
+def _split_items(df):
+    df = df.copy(deep=False)
+    df['Items Bought'] = df['Items Bought'].apply(lambda x: x.split(','))
+    return df
+
 def load_and_prepare_data(source_system):
     if source_system not in SOURCE_FILE_MAP:
         raise ValueError(f"Unknown source system: {source_system}")
-    df = pd.read_excel(SOURCE_FILE_MAP[source_system])
-    df['Items Bought'] = df['Items Bought'].apply(lambda x: x.split(','))
-    return df
+    return _split_items(get_dataset(SOURCE_FILE_MAP[source_system], read_excel_cached))
+
+def encode_transactions_sparse(baskets):
+    """
+    CSR boolean transactions x items matrix straight from lists of items, plus its column labels.
 
-def get_encoded_transactions(df):
+    Columns are the distinct items in sorted order, as in TransactionEncoder, and repeated items
+    in one basket count once. Memory grows with item occurrences, not transactions x items.
+    """
+    rows = np.repeat(np.arange(len(baskets), dtype=np.int64), baskets.apply(len).to_numpy())
+    codes, items = pd.factorize(pd.Series(list(chain.from_iterable(baskets)), dtype=object), sort=True)
+    width = max(len(items), 1)
+    # One cell per (transaction, item) pair, dropping repeats within a basket
+    rows, cols = np.divmod(np.unique(rows * width + codes), width)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=bool), (rows, cols)), shape=(len(baskets), len(items))
+    )
+    return matrix, list(items)
+
+def get_encoded_transactions(df, sparse_output=False):
+    if sparse_output:
+        matrix, items = encode_transactions_sparse(df['Items Bought'])
+        return pd.DataFrame.sparse.from_spmatrix(matrix, columns=items)
     te = TransactionEncoder()
     te_ary = te.fit(df['Items Bought']).transform(df['Items Bought'])
     return pd.DataFrame(te_ary, columns=te.columns_)
 
-def get_product_bundles(source_system):
-    df = load_and_prepare_data(source_system)
-    df_encoded = get_encoded_transactions(df)
+# ---------- MINED MODEL ----------
+class MinedModel:
+    """Frequent itemsets and association rules mined once from one version of an orders file."""
+
+    def __init__(self, itemsets, rules, transactions, state=None):
+        self.itemsets = itemsets
+        self.rules = rules
+        self.transactions = transactions
+        # MiningState the model was read from, for updating it when orders are appended
+        self.state = state
 
-    itemsets = fpgrowth(df_encoded, min_support=SUPPORT_THRESHOLD, use_colnames=True)
-    itemsets['support_count'] = (itemsets['support'] * len(df)).astype(int)
+def _mine_larger_itemsets(matrix, items, counts, min_count, engine, allowed=None):
+    """3+ item itemsets and their counts, mined only where one can occur (and among `allowed` items)."""
+    possible = triangle_items(counts, min_count)
+    columns = np.flatnonzero(possible if allowed is None else possible & allowed)
+    found = pd.DataFrame({"itemsets": [], "support_count": np.array([], dtype=np.int64)})
+    if not len(columns):
+        return found
+
+    block = matrix[:, columns]
+    block = block[np.asarray(block.sum(axis=1)).ravel() >= 3]
+    kept = block.shape[0]
+    if kept < min_count:
+        return found
+
+    encoded = pd.DataFrame.sparse.from_spmatrix(block, columns=[items[c] for c in columns])
+    # Just under min_count / kept, so the miner's ceil(min_support * kept) lands on min_count
+    mined = MINING_ENGINES[engine](encoded, min_support=(min_count - 0.5) / kept, use_colnames=True)
+    mined = mined[mined['itemsets'].apply(len) >= 3]
+    return pd.DataFrame({
+        "itemsets": mined['itemsets'].to_numpy(),
+        "support_count": np.rint(mined['support'].to_numpy() * kept).astype(np.int64)
+    })
+
+def _model_from_state(state):
+    """
+    Frequent itemsets and rules from a MiningState's counts.
+
+    Items, pairs and single-antecedent rules all come from the sparse product XᵀX; only 3+ item
+    itemsets come from the mining engine.
+    """
+    n = state.transactions
+    min_count = max(math.ceil(state.support * n), 1)
+    larger = pd.DataFrame({
+        "itemsets": list(state.larger),
+        "support_count": np.array(list(state.larger.values()), dtype=np.int64)
+    })
+    itemsets = pd.concat([pair_itemsets(state.counts, state.items, min_count), larger], ignore_index=True)
+    itemsets.insert(0, 'support', itemsets['support_count'] / n)
     itemsets['length'] = itemsets['itemsets'].apply(lambda x: len(x))
 
-    bundles = itemsets[itemsets['length'] >= 2].sort_values(by='length', ascending=False)
+    support_counts = dict(zip(itemsets['itemsets'], itemsets['support_count']))
+    rules = pd.concat([
+        pair_rules(state.counts, state.items, n, min_count, CONFIDENCE_THRESHOLD),
+        itemset_rules(larger['itemsets'], support_counts, n, CONFIDENCE_THRESHOLD)
+    ], ignore_index=True)
+    rules = rules.sort_values(by="confidence", ascending=False)
+    return MinedModel(itemsets, rules, n)
+
+def mine_transactions(df, engine=DEFAULT_MINING_ENGINE):
+    """Frequent itemsets and rules for one orders frame, mined from scratch."""
+    return _model_from_state(_full_state(df, engine))
+
+# ---------- INCREMENTAL MINING ----------
+class MiningState:
+    """
+    Everything counted from the orders of one file so far, so appended orders can be mined alone.
+
+    `counts` is XᵀX over every transaction, giving exact item and pair counts, and `larger`
+    holds the count of every frequent 3+ item itemset. New items are appended to `items`.
+    """
+
+    def __init__(self, items, blocks, counts, larger, transactions, support, fingerprint):
+        self.items = items
+        self.position = {item: i for i, item in enumerate(items)}
+        self.blocks = blocks
+        self.counts = counts
+        self.larger = larger
+        self.transactions = transactions
+        self.support = support
+        self.fingerprint = fingerprint
+
+def _rows_fingerprint(values, start):
+    """Order-sensitive hash of rows start.. of 'Items Bought'; fingerprints of consecutive runs add up."""
+    rows = pd.Series(np.asarray(values), index=pd.RangeIndex(start, start + len(values)))
+    return int(pd.util.hash_pandas_object(rows, index=True).sum())
+
+def _full_state(df, engine):
+    baskets = df['Items Bought'].apply(lambda x: x.split(','))
+    matrix, items = encode_transactions_sparse(baskets)
+    n = len(df)
+    counts = cooccurrence_counts(matrix)
+    larger = _mine_larger_itemsets(matrix, items, counts, max(math.ceil(SUPPORT_THRESHOLD * n), 1), engine)
+    return MiningState(items, [matrix], counts, dict(zip(larger['itemsets'], larger['support_count'])),
+                       n, SUPPORT_THRESHOLD, _rows_fingerprint(df['Items Bought'], 0))
+
+def _update_state(state, df, engine):
+    """
+    FUP-style update of `state` with the orders appended after its last transaction.
+
+    Item and pair counts just add the new orders' XᵀX. Known frequent 3+ itemsets add their
+    counts in the new orders. An itemset that was infrequent can only have become frequent if it
+    is frequent within the new orders alone, so only those are counted against the old orders.
+    """
+    new_rows = df['Items Bought'].iloc[state.transactions:]
+    delta, delta_items = encode_transactions_sparse(new_rows.apply(lambda x: x.split(',')))
+    items = list(state.items)
+    position = dict(state.position)
+    for item in delta_items:
+        if item not in position:
+            position[item] = len(items)
+            items.append(item)
+    width = len(items)
+    remap = np.array([position[item] for item in delta_items], dtype=np.int64)
+    delta = sparse.csr_matrix((delta.data, remap[delta.indices], delta.indptr), shape=(delta.shape[0], width))
+    delta.sort_indices()
+
+    counts = state.counts.copy()
+    counts.resize((width, width))
+    delta_counts = cooccurrence_counts(delta)
+    counts = (counts + delta_counts).tocsr()
+
+    n = state.transactions + delta.shape[0]
+    min_count = max(math.ceil(state.support * n), 1)
+    columns = lambda itemset: tuple(position[item] for item in itemset)
+
+    tracked = list(state.larger)
+    larger = dict(zip(tracked, np.array(list(state.larger.values()), dtype=np.int64)
+                      + itemset_counts(delta, [columns(x) for x in tracked])))
+
+    # Every pair inside a frequent itemset is frequent overall too
+    pairs = sparse.triu(counts, k=1).tocoo()
+    keep = pairs.data >= min_count
+    frequent_pairs = set(zip(pairs.row[keep].tolist(), pairs.col[keep].tolist()))
+    found = _mine_larger_itemsets(delta, items, delta_counts, max(math.ceil(state.support * delta.shape[0]), 1), engine,
+                                  allowed=triangle_items(counts, min_count))
+    candidates = [
+        (itemset, count) for itemset, count in zip(found['itemsets'], found['support_count'])
+        if itemset not in larger
+        and all(pair in frequent_pairs for pair in combinations(sorted(columns(itemset)), 2))
+    ]
+    if candidates:
+        old_counts = sum(
+            itemset_counts(sparse.csr_matrix((block.data, block.indices, block.indptr), shape=(block.shape[0], width)),
+                           [columns(x) for x, _ in candidates])
+            for block in state.blocks
+        )
+        for (itemset, count), old in zip(candidates, old_counts):
+            larger[itemset] = count + old
+
+    blocks = state.blocks + [delta]
+    if len(blocks) > MAX_TRANSACTION_BLOCKS:
+        blocks = [sparse.vstack([
+            sparse.csr_matrix((b.data, b.indices, b.indptr), shape=(b.shape[0], width)) for b in blocks
+        ], format="csr")]
+    fingerprint = (state.fingerprint + _rows_fingerprint(new_rows, state.transactions)) % 2 ** 64
+    return MiningState(items, blocks, counts, {x: c for x, c in larger.items() if c >= min_count},
+                       n, state.support, fingerprint)
+
+def _mine_source(df, previous, engine):
+    """
+    Mine one version of an orders file, from the previous version's counts when rows were only
+    appended to it, and from scratch when anything else changed. `previous` is the newest
+    MinedModel the registry kept for the file; a request still on an older, shorter version
+    mines its own frame from scratch and leaves the newer counts alone.
+    """
+    state = previous.state if previous is not None else None
+    n = len(df)
+    appended = (
+        INCREMENTAL_MINING and state is not None and state.support == SUPPORT_THRESHOLD
+        and n >= state.transactions
+        and _rows_fingerprint(df['Items Bought'].iloc[:state.transactions], 0) == state.fingerprint
+    )
+    if not appended:
+        state = _full_state(df, engine)
+    elif n > state.transactions:
+        print(f"➕ Updating mined itemsets with {n - state.transactions} new orders")
+        state = _update_state(state, df, engine)
+    model = _model_from_state(state)
+    model.state = state
+    return model
+
+def get_mined_model(source_system, engine=DEFAULT_MINING_ENGINE):
+    """
+    The source's MinedModel, shared by /bundles and /recommendations.
+
+    It is stored as a derived structure on the registry entry, so the file is mined once per
+    version. The registry carries the newest model (and its MiningState) over reloads, so
+    orders appended since then are mined on their own and merged into its counts. Every engine
+    finds the same itemsets, so one model serves them all; `engine` picks the miner whenever
+    the model has to be built or updated.
+    """
+    if source_system not in SOURCE_FILE_MAP:
+        raise ValueError(f"Unknown source system: {source_system}")
+    if engine not in MINING_ENGINES:
+        raise ValueError(f"Unknown mining engine: {engine}")
+    return registry.derived(SOURCE_FILE_MAP[source_system], read_excel_cached, "mined_itemsets",
+                            lambda df, previous: _mine_source(df, previous, engine), carry=True)
+
+def get_product_bundles(source_system, engine=DEFAULT_MINING_ENGINE):
+    itemsets = get_mined_model(source_system, engine).itemsets
+
+    # Ties on length go to the most frequent bundles, whichever order the engine found them in
+    bundles = itemsets[itemsets['length'] >= 2].sort_values(by=['length', 'support'], ascending=False, kind='stable').head(20).copy()
     # Convert frozensets to list for JSON serialization
     bundles['itemsets'] = bundles['itemsets'].apply(lambda x: list(x))
-    return bundles.head(20).to_dict(orient="records")
+    return bundles.to_dict(orient="records")
 
-def get_recommendations(source_system):
-    df = load_and_prepare_data(source_system)
-    df_encoded = get_encoded_transactions(df)
-
-    itemsets = fpgrowth(df_encoded, min_support=SUPPORT_THRESHOLD, use_colnames=True)
-    rules = association_rules(itemsets, metric="confidence", min_threshold=CONFIDENCE_THRESHOLD)
-    rules = rules.sort_values(by="confidence", ascending=False)
+def get_recommendations(source_system, engine=DEFAULT_MINING_ENGINE):
+    rules = get_mined_model(source_system, engine).rules
 
     results = []
-    for _, row in rules.iterrows():
+    for _, row in rules.head(20).iterrows():
         results.append({
             "antecedents": list(row["antecedents"]),
             "consequents": list(row["consequents"]),
             "confidence": round(row["confidence"], 4)
         })
     
-    return results[:20]
+    return results
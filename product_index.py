@@ -0,0 +1,103 @@
+# product_index.py
+import numpy as np
+import pandas as pd
+
+from dataset_registry import registry
+
+
+def _as_datetime64(value):
+    return pd.Timestamp(value).to_datetime64()
+
+
+class ProductIndex:
+    """
+    A daily sales table sorted once by (product, date) with per-product row offsets.
+
+    Rows for product i occupy frame.iloc[offsets[i]:offsets[i + 1]], already in date order,
+    so slicing a product is O(1) and date windows within it are found by binary search.
+    """
+
+    def __init__(self, df, product_col="product", date_col="date"):
+        df = df[df[product_col].notna()]
+        df = df.sort_values([product_col, date_col], kind="mergesort").reset_index(drop=True)
+        codes, products = pd.factorize(df[product_col], sort=True)
+
+        self.frame = df
+        self.product_col = product_col
+        self.date_col = date_col
+        self.products = list(products)
+        self.codes = codes
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(products)))))
+        self.dates = df[date_col].to_numpy()
+        self._position = {product: i for i, product in enumerate(self.products)}
+        self._keys = None
+        self._stride = None
+        self._row_hashes = None
+
+    def __len__(self):
+        return len(self.products)
+
+    def __contains__(self, product):
+        return product in self._position
+
+    def positions(self, products):
+        """Position of each of `products` in `products` order, -1 for unknown ones."""
+        return np.array([self._position.get(p, -1) for p in products], dtype=np.int64)
+
+    def row_hashes(self):
+        """Per-row uint64 hash of every column, computed once: compares rows across index versions."""
+        if self._row_hashes is None:
+            self._row_hashes = pd.util.hash_pandas_object(self.frame, index=False).to_numpy()
+        return self._row_hashes
+
+    def bounds(self, product, start=None, end=None):
+        """Row range [lo, hi) of `product` with start <= date <= end; (0, 0) if unknown."""
+        i = self._position.get(product)
+        if i is None:
+            return 0, 0
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        dates = self.dates[lo:hi]
+        if start is not None:
+            lo_shift = int(np.searchsorted(dates, _as_datetime64(start), side="left"))
+        else:
+            lo_shift = 0
+        if end is not None:
+            hi = lo + int(np.searchsorted(dates, _as_datetime64(end), side="right"))
+        return lo + lo_shift, max(hi, lo + lo_shift)
+
+    def rows(self, product, start=None, end=None):
+        lo, hi = self.bounds(product, start, end)
+        return self.frame.iloc[lo:hi]
+
+    def _search_keys(self):
+        # (product code, seconds since first date) packed into one sorted int64 key, so one
+        # searchsorted call answers a date bound for every product at once
+        if self._keys is None:
+            seconds = (self.dates - self.dates.min()) // np.timedelta64(1, "s") if len(self.dates) else np.zeros(0, np.int64)
+            self._stride = int(seconds.max()) + 2 if len(seconds) else 2
+            self._keys = self.codes.astype(np.int64) * self._stride + seconds.astype(np.int64)
+        return self._keys
+
+    def _date_offset(self, value, ceil):
+        delta = (_as_datetime64(value) - self.dates.min()) / np.timedelta64(1, "s")
+        return int(np.ceil(delta)) if ceil else int(np.floor(delta))
+
+    def window_bounds(self, start=None, end=None):
+        """Vectorised `bounds` for every product: arrays lo, hi aligned with `products`."""
+        lo, hi = self.offsets[:-1].copy(), self.offsets[1:].copy()
+        if len(lo) == 0:
+            return lo, hi
+        keys = self._search_keys()
+        base = np.arange(len(lo), dtype=np.int64) * self._stride
+        if start is not None:
+            offset = min(max(self._date_offset(start, ceil=True), 0), self._stride - 1)
+            lo = np.searchsorted(keys, base + offset, side="left")
+        if end is not None:
+            offset = min(max(self._date_offset(end, ceil=False), -1), self._stride - 2)
+            hi = np.searchsorted(keys, base + offset, side="right")
+        return lo, np.maximum(hi, lo)
+
+
+def get_product_index(path, loader):
+    """ProductIndex for a registry-managed daily file, rebuilt whenever the file reloads."""
+    return registry.derived(path, loader, "product_index", ProductIndex)
@@ -2,6 +2,8 @@ import os
 import pandas as pd
 import re
 from sentence_transformers import SentenceTransformer, util
+from ingest_cache import read_excel_cached
+from dataset_registry import get_dataset
 
 # ---------- CONFIG ----------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -20,8 +22,8 @@ def clean_text(text):
 # ---------- MAIN FUNCTION ----------
 def compute_product_similarity():
     # Load Excel files
-    orion_df = pd.read_excel(ORION_FILE)
-    sdp_df = pd.read_excel(SDP_FILE)
+    orion_df = get_dataset(ORION_FILE, read_excel_cached)
+    sdp_df = get_dataset(SDP_FILE, read_excel_cached)
 
     # Rename columns
     orion_df = orion_df.rename(columns={"PRODUCT_CODE": "product_name", "PRODUCT_DSC": "product_description"})
@@ -0,0 +1,121 @@
+# single_flight_cache.py
+import threading
+from collections import OrderedDict
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlightCache:
+    """
+    Thread-safe LRU cache whose misses are computed once per key.
+
+    A `get_or_compute` for a key that is already being computed waits for that computation
+    instead of starting its own; if it raises, every waiter gets the exception and nothing is
+    cached. At most `max_entries` values are kept, evicting the least recently used.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._values = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.waits = self.evictions = self.invalidations = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._values
+
+    def __len__(self):
+        return len(self._values)
+
+    def get_or_compute(self, key, compute):
+        return self.get_or_compute_many([key], lambda keys: {key: compute()})[key]
+
+    def get_or_compute_many(self, keys, compute):
+        """
+        {key: value} for every key in `keys`. Missing keys nobody else is computing are computed
+        together by one `compute(missing)` call returning {key: value}; keys already in flight
+        elsewhere are waited for rather than computed twice.
+        """
+        values, led, waiting = {}, {}, {}
+        with self._lock:
+            for key in keys:
+                if key in self._values:
+                    self._values.move_to_end(key)
+                    self.hits += 1
+                    values[key] = self._values[key]
+                elif key in self._inflight:
+                    self.waits += 1
+                    waiting[key] = self._inflight[key]
+                else:
+                    self.misses += 1
+                    led[key] = self._inflight[key] = _Call()
+
+        if led:
+            try:
+                computed = compute(list(led))
+                for key, call in led.items():
+                    call.value = values[key] = computed[key]
+                    self.put(key, call.value)
+            except BaseException as e:
+                for key, call in led.items():
+                    if key not in values:
+                        call.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key in led:
+                        self._inflight.pop(key, None)
+                for call in led.values():
+                    call.done.set()
+
+        for key, call in waiting.items():
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            values[key] = call.value
+        return values
+
+    def ensure_capacity(self, max_entries):
+        """Raise the bound to at least `max_entries`, e.g. to hold a whole catalogue; it never shrinks."""
+        with self._lock:
+            self.max_entries = max(self.max_entries, max_entries)
+
+    def put(self, key, value):
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, predicate):
+        """Drop every cached key for which `predicate(key)` is true, e.g. an old data version."""
+        with self._lock:
+            stale = [key for key in self._values if predicate(key)]
+            for key in stale:
+                del self._values[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.waits
+            return {
+                "entries": len(self._values),
+                "max_entries": self.max_entries,
+                "in_flight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round((self.hits + self.waits) / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,169 @@
+# timeseries_store.py
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from ingest_cache import cache_path, read_excel_cached, source_version
+from product_index import ProductIndex
+
+# ---------- CONFIG ----------
+# Dense products x days matrix, written next to the Parquet copy in .ingest_cache/
+MATRIX_SUFFIX = ".matrix.npy"
+META_SUFFIX = ".matrix.json"
+MATRIX_DTYPE = np.float32
+
+_open_stores = {}
+_open_lock = threading.Lock()
+
+
+class TimeSeriesStore:
+    """
+    Read-only view over a memory-mapped (products x days) order matrix.
+
+    Every calendar day between the first and last date in the source has a column, with
+    days a product had no orders stored as 0. Because the matrix is opened with
+    mmap_mode="r", every process reading the same file shares one copy in the page cache.
+    """
+
+    def __init__(self, matrix, meta):
+        self.matrix = matrix
+        self.version = meta["version"]
+        self.products = meta["products"]
+        self.dates = pd.date_range(meta["start_date"], periods=matrix.shape[1], freq="D", name="date")
+        self.first_day = np.asarray(meta["first_day"], dtype=np.int64)
+        self.last_day = np.asarray(meta["last_day"], dtype=np.int64)
+        self._position = {product: i for i, product in enumerate(self.products)}
+
+    def __len__(self):
+        return len(self.products)
+
+    def __contains__(self, product):
+        return product in self._position
+
+    def position(self, product):
+        if product not in self._position:
+            raise ValueError(f"Unknown product: {product}")
+        return self._position[product]
+
+    def _offset(self, date):
+        return (pd.Timestamp(date).normalize() - self.dates[0]).days
+
+    def day(self, date):
+        """Column index for `date`, clipped to the stored range."""
+        return int(min(max(self._offset(date), 0), len(self.dates)))
+
+    def series(self, product, trim=False):
+        """
+        Daily orders for one product as a Series indexed by date.
+
+        With trim=True the series spans only the product's own first to last order, which
+        matches what `asfreq("D").fillna(0)` gives on that product's rows.
+        """
+        i = self.position(product)
+        lo, hi = (self.first_day[i], self.last_day[i] + 1) if trim else (0, len(self.dates))
+        return pd.Series(np.asarray(self.matrix[i, lo:hi]), index=self.dates[lo:hi], name="total_orders")
+
+    def window(self, start=None, end=None):
+        """Columns for start <= date <= end, plus the matching dates."""
+        lo = self.day(start) if start is not None else 0
+        # Clip end + 1, not end: an `end` before the first stored day must give an empty window
+        hi = int(min(max(self._offset(end) + 1, 0), len(self.dates))) if end is not None else len(self.dates)
+        return self.matrix[:, lo:hi], self.dates[lo:hi]
+
+    def totals(self, start=None, end=None):
+        block, _ = self.window(start, end)
+        return pd.Series(block.sum(axis=1, dtype=np.float64), index=self.products, name="total_orders")
+
+
+# ---------- BUILD ----------
+def pivot_index(index):
+    """The (products x days) matrix of a ProductIndex, plus the store metadata except its version."""
+    start = pd.Timestamp(index.dates.min()).normalize()
+    end = pd.Timestamp(index.dates.max()).normalize()
+    n_days = (end - start).days + 1
+
+    days = ((pd.DatetimeIndex(index.dates).normalize() - start).days).to_numpy()
+    matrix = np.zeros((len(index.products), n_days), dtype=MATRIX_DTYPE)
+    np.add.at(matrix, (index.codes, days), index.frame["total_orders"].to_numpy(dtype=MATRIX_DTYPE))
+
+    starts, ends = index.offsets[:-1], index.offsets[1:] - 1
+    meta = {
+        "products": list(index.products),
+        "start_date": start.strftime("%Y-%m-%d"),
+        "n_days": n_days,
+        "first_day": days[starts].tolist(),
+        "last_day": days[ends].tolist()
+    }
+    return matrix, meta
+
+
+def store_from_index(index):
+    """In-memory TimeSeriesStore over a ProductIndex, for callers that already hold the rows."""
+    matrix, meta = pivot_index(index)
+    return TimeSeriesStore(matrix, {**meta, "version": None})
+
+
+def build_store(path, df=None, version=None):
+    """Pivot a (date, product, total_orders) table into the on-disk matrix for `path`."""
+    if df is None:
+        df = read_excel_cached(path, date_columns=["date"])
+    matrix, meta = pivot_index(ProductIndex(df))
+    meta = {
+        "version": version or source_version(path),
+        **meta,
+        "products": [str(p) for p in meta["products"]]
+    }
+
+    matrix_file = cache_path(path, MATRIX_SUFFIX)
+    meta_file = cache_path(path, META_SUFFIX)
+    os.makedirs(os.path.dirname(matrix_file), exist_ok=True)
+    tmp = f"{matrix_file}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        np.save(f, matrix)
+    os.replace(tmp, matrix_file)
+    tmp = f"{meta_file}.tmp.{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_file)
+    return meta
+
+
+def _read_store_meta(path):
+    meta_file = cache_path(path, META_SUFFIX)
+    if not os.path.exists(meta_file) or not os.path.exists(cache_path(path, MATRIX_SUFFIX)):
+        return None
+    with open(meta_file, "r") as f:
+        return json.load(f)
+
+
+def open_store(path):
+    """
+    Open the matrix for a daily source file, rebuilding it first if the source changed.
+
+    Opened stores are kept per process and reused until the source version moves on.
+    """
+    key = os.path.abspath(path)
+    version = source_version(path)
+    with _open_lock:
+        store = _open_stores.get(key)
+        if store is not None and store.version == version:
+            return store
+
+        meta = _read_store_meta(path)
+        if meta is None or meta.get("version") != version:
+            meta = build_store(path, version=version)
+        matrix = np.load(cache_path(path, MATRIX_SUFFIX), mmap_mode="r")
+        store = TimeSeriesStore(matrix, meta)
+        _open_stores[key] = store
+        return store
+
+
+if __name__ == "__main__":
+    import sys
+
+    for source_file in sys.argv[1:]:
+        store = open_store(source_file)
+        print(f"✅ {source_file}: {len(store)} products x {len(store.dates)} days → {cache_path(source_file, MATRIX_SUFFIX)}")
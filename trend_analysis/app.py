@@ -1,18 +1,11 @@
 # app.py
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from datetime import timedelta
-from trend_analysis import generate_summary, generate_detail, get_valid_sources
+from trend_analysis import generate_summary_page, generate_detail, get_valid_sources, load_trend_tables, TIME_RANGE_MAP, SUMMARY_SORT_FIELDS, DETAIL_GRANULARITIES
+from dataset_registry import registry
 
 app = Flask(__name__)
-CORS(app)
-
-TIME_RANGE_MAP = {
-    "1w": timedelta(weeks=1),
-    "1m": timedelta(days=30),
-    "1y": timedelta(days=365),
-    "2y": timedelta(days=730)
-}
+CORS(app, expose_headers=["X-Total-Count"])
 
 @app.route("/analysis/summary", methods=["POST"])
 def trend_summary():
@@ -23,9 +16,26 @@ def trend_summary():
     if not source or analysis_type != "trend_analysis":
         return jsonify({"error": "Missing or invalid parameters"}), 400
 
+    max_points = data.get("max_points")
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 3):
+        return jsonify({"error": "Invalid max_points"}), 400
+
+    search = data.get("search")
+    sort_by = data.get("sort_by", "trend_percent")
+    order = data.get("order", "desc")
+    offset = data.get("offset", 0)
+    limit = data.get("limit")
+    if sort_by not in SUMMARY_SORT_FIELDS or order not in ("asc", "desc"):
+        return jsonify({"error": "Invalid sort_by or order"}), 400
+    if not isinstance(offset, int) or offset < 0 or (limit is not None and (not isinstance(limit, int) or limit < 1)):
+        return jsonify({"error": "Invalid offset or limit"}), 400
+
     try:
-        result = generate_summary(source)
-        return jsonify(result)
+        page = generate_summary_page(source, max_points=max_points, search=search, sort_by=sort_by,
+                                     order=order, offset=offset, limit=limit)
+        response = jsonify(page["products"])
+        response.headers["X-Total-Count"] = str(page["total"])
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -43,8 +53,17 @@ def trend_detail():
     if time_range not in TIME_RANGE_MAP:
         return jsonify({"error": "Invalid time_range"}), 400
 
+    granularity = data.get("granularity", "day")
+    if granularity not in DETAIL_GRANULARITIES:
+        return jsonify({"error": "Invalid granularity"}), 400
+
+    max_points = data.get("max_points")
+    if max_points is not None and (not isinstance(max_points, int) or max_points < 3):
+        return jsonify({"error": "Invalid max_points"}), 400
+
     try:
-        result = generate_detail(source, product, TIME_RANGE_MAP[time_range])
+        result = generate_detail(source, product, TIME_RANGE_MAP[time_range], max_points=max_points,
+                                 granularity=granularity)
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -53,5 +72,11 @@ def trend_detail():
 def list_sources():
     return jsonify(get_valid_sources())
 
+@app.route("/datasets", methods=["GET"])
+def dataset_stats():
+    return jsonify(registry.stats())
+
 if __name__ == "__main__":
+    load_trend_tables()
+    registry.start_watcher()
     app.run(debug=True, port=5000)
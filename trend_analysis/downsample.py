@@ -0,0 +1,46 @@
+# downsample.py
+import math
+
+import numpy as np
+
+# Fewer than 3 points leaves no room between the fixed first and last points
+MIN_POINTS = 3
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Positions of the points kept by Largest-Triangle-Three-Buckets.
+
+    Always keeps the first and last point; every bucket in between contributes the point that
+    forms the largest triangle with the previously kept point and the next bucket's average,
+    which preserves peaks and dips far better than taking every k-th point.
+    """
+    n = len(y)
+    if max_points is None or max_points >= n or max_points < MIN_POINTS:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (max_points - 2)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+
+    for i in range(max_points - 2):
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        next_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def date_axis(dates):
+    """Dates as float days, the x axis LTTB measures triangle areas on."""
+    values = np.asarray(dates, dtype="datetime64[ns]").astype(np.int64)
+    return values / 86_400e9
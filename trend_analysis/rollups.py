@@ -0,0 +1,30 @@
+# rollups.py
+from product_index import ProductIndex
+
+# Calendar buckets served by /analysis/detail?granularity=..., keyed by request value
+ROLLUP_FREQUENCIES = {
+    "week": "W-SUN",
+    "month": "M"
+}
+
+
+def build_rollup(df, granularity):
+    """
+    Sum total_orders per product per calendar week or month.
+
+    Each bucket is dated by its first day and the result is itself a ProductIndex, so long
+    windows slice and regress over ~52-104 bucket rows instead of ~365-730 daily rows. The
+    bucket still in progress at the source's last date is left out: summed as if complete it
+    would drag every trend down.
+    """
+    df = df[df["product"].notna()]
+    periods = df["date"].dt.to_period(ROLLUP_FREQUENCIES[granularity])
+    last_date = df["date"].max()
+    complete = periods.dt.end_time.dt.normalize() <= last_date
+    df, periods = df[complete], periods[complete]
+    rolled = df.groupby([df["product"], periods.dt.start_time.rename("date")], sort=True)["total_orders"].sum().reset_index()
+    return ProductIndex(rolled)
+
+
+def build_rollups(df):
+    return {granularity: build_rollup(df, granularity) for granularity in ROLLUP_FREQUENCIES}
@@ -0,0 +1,174 @@
+# trend_accumulators.py
+import numpy as np
+
+from trend_engine import segment_rows
+
+
+def _segment_sums(values, lo, hi, n_groups, rank_offset=0):
+    """Per-segment (count, Σy, Σy², Σ(rank + rank_offset)·y) over rows [lo, hi)."""
+    rows, group, within = segment_rows(lo, hi)
+    y = values[rows]
+    rank = within + (rank_offset[group] if np.ndim(rank_offset) else rank_offset)
+    return (
+        np.bincount(group, minlength=n_groups).astype(np.float64),
+        np.bincount(group, y, minlength=n_groups),
+        np.bincount(group, y * y, minlength=n_groups),
+        np.bincount(group, rank * y, minlength=n_groups)
+    )
+
+
+class WindowStats:
+    """
+    Running least-squares sums for one trailing window, one slot per product.
+
+    x is a row's rank inside the window (0 for the oldest row), matching the regressions
+    in trend_engine. Σx and Σx² follow from n alone, so only n, Σy, Σxy and Σy² are stored.
+    lo/hi are each product's current window rows in the index the stats were last moved to.
+    """
+
+    def __init__(self, lo, hi, n, sum_y, sum_yy, sum_xy):
+        self.lo, self.hi = lo, hi
+        self.n, self.sum_y, self.sum_yy, self.sum_xy = n, sum_y, sum_yy, sum_xy
+
+    @classmethod
+    def from_rows(cls, values, lo, hi):
+        n, sum_y, sum_yy, sum_xy = _segment_sums(values, lo, hi, len(lo))
+        return cls(lo, hi, n, sum_y, sum_yy, sum_xy)
+
+    def evict(self, values, k):
+        """Drop the k[i] oldest rows of each product and shift the remaining ranks down by k[i]."""
+        end = self.lo + k
+        n_out, y_out, yy_out, xy_out = _segment_sums(values, self.lo, end, len(k))
+        self.n -= n_out
+        self.sum_y -= y_out
+        self.sum_yy -= yy_out
+        self.sum_xy = self.sum_xy - xy_out - k * self.sum_y
+        self.lo = end
+
+    def append(self, values, hi):
+        """Add rows [self.hi, hi) of each product, ranked after the rows already held."""
+        n_in, y_in, yy_in, xy_in = _segment_sums(values, self.hi, hi, len(hi), rank_offset=self.n)
+        self.n += n_in
+        self.sum_y += y_in
+        self.sum_yy += yy_in
+        self.sum_xy += xy_in
+        self.hi = hi
+
+    def metrics(self):
+        """Same fields as trend_engine.batch_trends, read straight from the sums."""
+        n = self.n
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sxx = n * sum_xx - sum_x ** 2
+            sxy = n * self.sum_xy - sum_x * self.sum_y
+            syy = np.maximum(n * self.sum_yy - self.sum_y ** 2, 0.0)
+            valid = n >= 2
+            slope = np.where(valid, sxy / sxx, 0.0)
+            avg = np.where(n > 0, self.sum_y / n, 0.0)
+            r_den = np.sqrt(sxx * syy)
+            r = np.where(valid & (r_den > 0), sxy / r_den, 0.0)
+        return {
+            "n": n.astype(np.int64),
+            "total": self.sum_y.copy(),
+            "avg": avg,
+            "slope": slope,
+            "intercept": avg - slope * np.where(n > 0, (n - 1) / 2, 0.0),
+            "r_squared": np.clip(r, -1.0, 1.0) ** 2,
+            "valid": valid
+        }
+
+
+class TrendAccumulators:
+    """
+    Trailing-window regression sums for every product, kept current as data is appended.
+
+    `advance` moves the windows to a newer ProductIndex of the same source. When the new data
+    only adds rows after the previous reference date (checked against the per-row hashes of the
+    old rows), each window evicts the rows that fell out and appends the new ones, so no
+    regression is recomputed over the full window. Anything else triggers a full rebuild.
+    """
+
+    def __init__(self, index, windows, value_col="total_orders"):
+        self.windows_spec = windows
+        self.value_col = value_col
+        self._reset(index)
+
+    def _reset(self, index):
+        self.index = index
+        self.values = index.frame[self.value_col].to_numpy(dtype=np.float64)
+        self.reference_date = index.frame[index.date_col].max()
+        self.windows = {}
+        for key, delta in self.windows_spec.items():
+            lo, hi = index.window_bounds(self.reference_date - delta, self.reference_date)
+            self.windows[key] = WindowStats.from_rows(self.values, lo, hi)
+
+    def _appended_positions(self, new_index):
+        """Position in new_index of every old product, or None if history was not just appended to."""
+        old = self.index
+        positions = new_index.positions(old.products)
+        if (positions < 0).any():
+            return None
+        _, prefix_hi = new_index.window_bounds(None, self.reference_date)
+        prefix_counts = prefix_hi[positions] - new_index.offsets[positions]
+        if not np.array_equal(prefix_counts, np.diff(old.offsets)):
+            return None
+        # Old products' rows up to the old reference date, in the old index's row order
+        rows, _, _ = segment_rows(new_index.offsets[positions], prefix_hi[positions])
+        if not np.array_equal(new_index.row_hashes()[rows], old.row_hashes()):
+            return None
+        return positions
+
+    def advance(self, new_index):
+        """Move every window to `new_index`; returns True if it was done incrementally."""
+        if new_index is self.index:
+            return True
+        values = new_index.frame[self.value_col].to_numpy(dtype=np.float64)
+        positions = self._appended_positions(new_index)
+        new_reference = new_index.frame[new_index.date_col].max()
+        if positions is None or new_reference < self.reference_date:
+            self._reset(new_index)
+            return False
+
+        old_offsets = self.index.offsets[:-1]
+        new_offsets = new_index.offsets[:-1]
+        n_products = len(new_index.products)
+
+        for key, delta in self.windows_spec.items():
+            stats = self.windows[key]
+            new_lo, new_hi = new_index.window_bounds(new_reference - delta, new_reference)
+
+            # Carry each old product's window into the new row numbering; new products start empty
+            lo, hi = new_lo.copy(), new_lo.copy()
+            lo[positions] = new_offsets[positions] + (stats.lo - old_offsets)
+            hi[positions] = new_offsets[positions] + (stats.hi - old_offsets)
+            moved = WindowStats(lo, hi, *(self._expand(a, positions, n_products)
+                                         for a in (stats.n, stats.sum_y, stats.sum_yy, stats.sum_xy)))
+
+            # Rows before the new window start leave from the front; if the gap is larger than
+            # the window itself the window empties and restarts at new_lo
+            moved.evict(values, np.clip(new_lo - moved.lo, 0, moved.hi - moved.lo))
+            restart = moved.lo < new_lo
+            moved.lo[restart] = moved.hi[restart] = new_lo[restart]
+            for array in (moved.n, moved.sum_y, moved.sum_yy, moved.sum_xy):
+                array[restart] = 0.0
+            moved.append(values, new_hi)
+            self.windows[key] = moved
+
+        self.index = new_index
+        self.values = values
+        self.reference_date = new_reference
+        return True
+
+    @staticmethod
+    def _expand(array, positions, size):
+        out = np.zeros(size, dtype=array.dtype)
+        out[positions] = array
+        return out
+
+    def metrics(self, key):
+        return self.windows[key].metrics()
+
+    def bounds(self, key):
+        stats = self.windows[key]
+        return stats.lo, stats.hi
@@ -1,7 +1,16 @@
 # trend_analysis.py
-import pandas as pd
+import os
+import threading
 import numpy as np
-from scipy import stats
+from datetime import timedelta
+from ingest_cache import read_excel_cached
+from dataset_registry import get_dataset, registry
+from product_index import get_product_index
+from trend_engine import batch_trends, segment_rows
+from trend_accumulators import TrendAccumulators
+from trend_table import TrendTable, build_window_table
+from downsample import lttb_indices, date_axis
+from rollups import build_rollups, ROLLUP_FREQUENCIES
 
 # Centralized source config
 SOURCE_FILE_MAP = {
@@ -10,102 +19,204 @@ SOURCE_FILE_MAP = {
     "xyz": "data/sorted_file_xyz.xlsx"
 }
 
+# Trailing windows served by /analysis/detail; "1m" is also the summary preview window
+TIME_RANGE_MAP = {
+    "1w": timedelta(weeks=1),
+    "1m": timedelta(days=30),
+    "1y": timedelta(days=365),
+    "2y": timedelta(days=730)
+}
+SUMMARY_WINDOW = "1m"
+DETAIL_GRANULARITIES = ("day",) + tuple(ROLLUP_FREQUENCIES)
+SUMMARY_SORT_FIELDS = ("trend_percent", "total_sales", "avg_sales", "r_squared", "product")
+SUMMARY_COLUMNS = ["total_sales", "avg_sales", "trend_percent", "trend_description", "trend_icon", "color", "r_squared"]
+
+# Running regression sums and the trend table materialised from them, per source
+_accumulators = {}
+_trend_tables = {}
+_accumulators_lock = threading.Lock()
+
 def get_valid_sources():
     return list(SOURCE_FILE_MAP.keys())
 
+def _read_daily(path):
+    return read_excel_cached(path, date_columns=['date'])
+
 def load_data(source_system):
     if source_system not in SOURCE_FILE_MAP:
         raise ValueError(f"Unknown source system: {source_system}")
-    path = SOURCE_FILE_MAP[source_system]
-    df = pd.read_excel(path)
-    df['date'] = pd.to_datetime(df['date'])
-    return df
-
-def generate_summary(source_system):
-    df = load_data(source_system)
-    reference_date = df['date'].max()
-    preview_period = reference_date - pd.Timedelta(days=30)
-    results = []
-
-    for product in sorted(df['product'].unique()):
-        product_data = df[df['product'] == product]
-        period_data = product_data[(product_data['date'] >= preview_period) & (product_data['date'] <= reference_date)].sort_values('date')
-
-        if period_data.empty or len(period_data) < 2:
-            continue
-
-        total_sales = period_data['total_orders'].sum()
-        avg_sales = period_data['total_orders'].mean()
-        x = np.arange(len(period_data))
-        y = period_data['total_orders'].values
-
-        slope, _, r_value, _, _ = stats.linregress(x, y)
-        norm_slope = (slope / avg_sales * 100) if avg_sales > 0 else 0
-
-        if abs(norm_slope) < 2:
-            trend_icon, color, desc = '➡️', 'blue', 'Stable'
-        elif norm_slope > 0:
-            trend_icon, color, desc = ('⬆️', 'green', 'Upward') if norm_slope > 10 else ('↗️', 'green', 'Slight Upward')
+    return get_dataset(SOURCE_FILE_MAP[source_system], _read_daily)
+
+def load_index(source_system):
+    if source_system not in SOURCE_FILE_MAP:
+        raise ValueError(f"Unknown source system: {source_system}")
+    return get_product_index(SOURCE_FILE_MAP[source_system], _read_daily)
+
+def load_rollups(source_system):
+    """Weekly and monthly per-product totals, built once per load of the source file."""
+    if source_system not in SOURCE_FILE_MAP:
+        raise ValueError(f"Unknown source system: {source_system}")
+    return registry.derived(SOURCE_FILE_MAP[source_system], _read_daily, "trend_rollups", build_rollups)
+
+def _window_key(time_delta):
+    for key, delta in TIME_RANGE_MAP.items():
+        if delta == time_delta:
+            return key
+    return None
+
+def _refresh_trends(source_system):
+    """Advance the running sums to the current data, rebuild the trend table and roll-ups."""
+    index = load_index(source_system)
+    with _accumulators_lock:
+        table = _trend_tables.get(source_system)
+        if table is not None and table.index is index:
+            return table
+        acc = _accumulators.get(source_system)
+        if acc is None:
+            acc = _accumulators[source_system] = TrendAccumulators(index, TIME_RANGE_MAP)
         else:
-            trend_icon, color, desc = ('⬇️', 'red', 'Downward') if norm_slope < -10 else ('↘️', 'red', 'Slight Downward')
-
-        sparkline = period_data[['date', 'total_orders']].copy()
-        results.append({
-            "product": product,
-            "total_sales": int(total_sales),
-            "avg_sales": round(avg_sales, 1),
-            "trend_percent": round(norm_slope, 1),
-            "trend_description": desc,
-            "trend_icon": trend_icon,
-            "color": color,
-            "r_squared": round(r_value**2, 2),
-            "sparkline_data": sparkline.to_dict(orient="records")
-        })
-
-    return sorted(results, key=lambda x: x["trend_percent"], reverse=True)
-
-def generate_detail(source_system, product, time_delta):
-    df = load_data(source_system)
-    reference_date = df['date'].max()
-    start_date = reference_date - time_delta
-
-    product_data = df[(df['product'] == product) & (df['date'] >= start_date)].sort_values('date')
+            acc.advance(index)
+        table = _trend_tables[source_system] = TrendTable(acc)
+    load_rollups(source_system)
+    return table
+
+def _on_source_reload(path):
+    # Registry reload listener: rebuild the source's trend table off the request path
+    for source_system, source_path in SOURCE_FILE_MAP.items():
+        if os.path.abspath(source_path) == path:
+            _refresh_trends(source_system)
+
+for _path in SOURCE_FILE_MAP.values():
+    registry.add_listener(_path, _on_source_reload)
+
+def load_trend_tables():
+    """Load every source and build its trend table up front, so no request pays for the first build."""
+    for source_system in SOURCE_FILE_MAP:
+        try:
+            table = _refresh_trends(source_system)
+            print(f"✅ Trend table for {source_system}: {len(table.index.products)} products")
+        except Exception as e:
+            print(f"⚠️ Could not build trend table for {source_system}: {e}")
+
+def load_trend_table(source_system):
+    index = load_index(source_system)
+    table = _trend_tables.get(source_system)
+    if table is None or table.index is not index:
+        table = _refresh_trends(source_system)
+    return table
+
+def _sparkline_rows(index, lo, hi, max_points):
+    """Row positions for each product's sparkline, LTTB-reduced to max_points, and their counts."""
+    if max_points is None:
+        rows, _, _ = segment_rows(lo, hi)
+        return rows, hi - lo
+    # Only the page's rows are converted, so a page costs the same however large the source is
+    dates = index.dates
+    y = index.frame['total_orders'].to_numpy()
+    keep = [a + lttb_indices(date_axis(dates[a:b]), y[a:b], max_points) for a, b in zip(lo, hi)]
+    rows = np.concatenate(keep) if keep else np.zeros(0, dtype=np.int64)
+    return rows, np.array([len(k) for k in keep], dtype=np.int64)
+
+def _chart_data(product_data, trendline, max_points=None):
+    keep = lttb_indices(date_axis(product_data["date"]), product_data["total_orders"].to_numpy(), max_points)
+    if len(keep) < len(product_data):
+        product_data = product_data.iloc[keep]
+        trendline = [trendline[k] for k in keep] if trendline else trendline
+    return {
+        "dates": product_data["date"].dt.strftime("%Y-%m-%d").tolist(),
+        "actual": product_data["total_orders"].tolist(),
+        "trendline": trendline
+    }
+
+def rank_products(trends, search=None, sort_by="trend_percent", order="desc"):
+    """Summary rows matching `search` (case-insensitive substring), ordered on a precomputed metric."""
+    if sort_by == "trend_percent" and order == "desc":
+        ranked = trends.ranked[SUMMARY_WINDOW]
+    else:
+        table = trends.windows[SUMMARY_WINDOW]
+        table = table[table["valid"]]
+        ascending = order == "asc"
+        if sort_by == "product":
+            ranked = table.sort_index(ascending=ascending, kind="mergesort")
+        else:
+            ranked = table.sort_values(sort_by, ascending=ascending, kind="mergesort")
+    if search:
+        ranked = ranked[ranked.index.astype(str).str.contains(search, case=False, regex=False)]
+    return ranked
+
+def generate_summary_page(source_system, max_points=None, search=None, sort_by="trend_percent",
+                          order="desc", offset=0, limit=None):
+    """One page of the summary plus the number of matching products; only the page is serialised."""
+    if sort_by not in SUMMARY_SORT_FIELDS:
+        raise ValueError(f"Invalid sort_by: {sort_by}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Invalid order: {order}")
+
+    trends = load_trend_table(source_system)
+    ranked = rank_products(trends, search, sort_by, order)
+    page = ranked.iloc[offset:offset + limit if limit is not None else None]
+    df = trends.index.frame
+
+    # One conversion for every sparkline row, then cut per product
+    rows, counts = _sparkline_rows(trends.index, page["row_lo"].to_numpy(), page["row_hi"].to_numpy(), max_points)
+    window = df.iloc[rows][['date', 'total_orders']].to_dict(orient="records")
+    ends = np.cumsum(counts)
+
+    results = page[SUMMARY_COLUMNS].reset_index().to_dict(orient="records")
+    for i, row in enumerate(results):
+        row["total_sales"] = int(row["total_sales"])
+        row["sparkline_data"] = window[ends[i] - counts[i]:ends[i]]
+    return {"total": len(ranked), "offset": offset, "limit": limit, "products": results}
+
+def generate_summary(source_system, max_points=None, **page_options):
+    return generate_summary_page(source_system, max_points=max_points, **page_options)["products"]
+
+def generate_detail(source_system, product, time_delta, max_points=None, granularity="day"):
+    if granularity != "day":
+        return _generate_rollup_detail(source_system, product, time_delta, max_points, granularity)
+    window = _window_key(time_delta)
+    if window is None:
+        index = load_index(source_system)
+        return _fit_detail(index, product, index.frame['date'].max() - time_delta, time_delta, max_points)
+
+    trends = load_trend_table(source_system)
+    row = trends.lookup(window, product)
+    if row is None or row["n"] == 0:
+        raise ValueError("No data for product in this range")
+
+    product_data = trends.index.frame.iloc[int(row["row_lo"]):int(row["row_hi"])]
+    return _detail_payload(product, time_delta, row, product_data, trends.trendline(row), max_points, granularity)
+
+def _generate_rollup_detail(source_system, product, time_delta, max_points, granularity):
+    """Detail over weekly or monthly buckets whose first day falls inside the window."""
+    if granularity not in ROLLUP_FREQUENCIES:
+        raise ValueError(f"Invalid granularity: {granularity}")
+    reference_date = load_index(source_system).frame['date'].max()
+    rollup = load_rollups(source_system)[granularity]
+    return _fit_detail(rollup, product, reference_date - time_delta, time_delta, max_points, granularity)
+
+def _fit_detail(index, product, start_date, time_delta, max_points=None, granularity="day"):
+    """Detail computed on the fly for one product: ranges outside TIME_RANGE_MAP and roll-ups."""
+    lo, hi = index.bounds(product, start=start_date)
+    product_data = index.frame.iloc[lo:hi]
     if product_data.empty:
         raise ValueError("No data for product in this range")
 
-    total_sales = product_data['total_orders'].sum()
-    avg_sales = product_data['total_orders'].mean()
+    fit = batch_trends(index.frame['total_orders'].to_numpy(), np.array([lo]), np.array([hi]))
+    row = build_window_table([product], fit, np.array([lo]), np.array([hi])).iloc[0]
     x = np.arange(len(product_data))
-    y = product_data['total_orders'].values
-
-    if len(x) > 1:
-        slope, intercept, r_value, _, _ = stats.linregress(x, y)
-        trend_y = (slope * x + intercept).tolist()
-        norm_slope = (slope / avg_sales * 100) if avg_sales > 0 else 0
-
-        if abs(norm_slope) < 2:
-            desc = "Stable"
-        elif norm_slope > 0:
-            desc = "Upward" if norm_slope > 10 else "Slight Upward"
-        else:
-            desc = "Downward" if norm_slope < -10 else "Slight Downward"
-    else:
-        trend_y = []
-        norm_slope = 0
-        r_value = 0
-        desc = "Insufficient Data"
+    trendline = (row["slope"] * x + row["intercept"]).tolist() if row["valid"] else []
+    return _detail_payload(product, time_delta, row, product_data, trendline, max_points, granularity)
 
+def _detail_payload(product, time_delta, row, product_data, trendline, max_points, granularity):
     return {
         "product": product,
         "time_range_days": time_delta.days,
-        "total_sales": int(total_sales),
-        "avg_sales": round(avg_sales, 1),
-        "trend_percent": round(norm_slope, 1),
-        "trend_description": desc,
-        "r_squared": round(r_value**2, 2),
-        "chart_data": {
-            "dates": product_data["date"].dt.strftime("%Y-%m-%d").tolist(),
-            "actual": product_data["total_orders"].tolist(),
-            "trendline": trend_y
-        }
+        "granularity": granularity,
+        "total_sales": int(row["total_sales"]),
+        "avg_sales": row["avg_sales"],
+        "trend_percent": row["trend_percent"],
+        "trend_description": row["trend_description"],
+        "r_squared": row["r_squared"],
+        "chart_data": _chart_data(product_data, trendline, max_points)
     }
@@ -0,0 +1,70 @@
+# trend_engine.py
+import numpy as np
+
+# Trend thresholds on the slope normalised by average sales (percent per point)
+STABLE_THRESHOLD = 2
+STRONG_THRESHOLD = 10
+
+
+def segment_rows(lo, hi):
+    """Flat row positions for the segments [lo[i], hi[i]), with each row's segment id and offset."""
+    n = np.maximum(hi - lo, 0)
+    group = np.repeat(np.arange(len(n)), n)
+    within = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+    return lo[group] + within, group, within
+
+
+def batch_trends(values, lo, hi):
+    """
+    Least-squares fit of value against row position for every segment [lo[i], hi[i]) at once.
+
+    Mirrors scipy.stats.linregress(np.arange(n), y) per segment using closed-form sums, so the
+    whole catalogue is a handful of bincount reductions. Segments with fewer than two rows are
+    flagged in "valid" and get zero slope and r_squared.
+    """
+    rows, group, x = segment_rows(lo, hi)
+    n_groups = len(lo)
+    n = np.bincount(group, minlength=n_groups).astype(np.float64)
+    y = np.asarray(values, dtype=np.float64)[rows]
+    x = x.astype(np.float64)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = np.bincount(group, y, minlength=n_groups)
+        mean_y = np.where(n > 0, total / n, 0.0)
+        mean_x = np.where(n > 0, (n - 1) / 2, 0.0)
+        xc = x - mean_x[group]
+        yc = y - mean_y[group]
+        ssxm = np.where(n > 0, np.bincount(group, xc * xc, minlength=n_groups) / n, 0.0)
+        ssxym = np.where(n > 0, np.bincount(group, xc * yc, minlength=n_groups) / n, 0.0)
+        ssym = np.where(n > 0, np.bincount(group, yc * yc, minlength=n_groups) / n, 0.0)
+
+        valid = n >= 2
+        slope = np.where(valid, ssxym / ssxm, 0.0)
+        r_den = np.sqrt(ssxm * ssym)
+        r = np.where(valid & (r_den > 0), ssxym / r_den, 0.0)
+
+    return {
+        "n": n.astype(np.int64),
+        "total": total,
+        "avg": mean_y,
+        "slope": slope,
+        "intercept": mean_y - slope * mean_x,
+        "r_squared": np.clip(r, -1.0, 1.0) ** 2,
+        "valid": valid,
+        "rows": rows,
+        "group": group
+    }
+
+
+def normalised_slope(slope, avg):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(avg > 0, slope / avg * 100, 0.0)
+
+
+def describe_trend(norm_slope):
+    """(icon, color, description) for a normalised slope."""
+    if abs(norm_slope) < STABLE_THRESHOLD:
+        return '➡️', 'blue', 'Stable'
+    if norm_slope > 0:
+        return ('⬆️', 'green', 'Upward') if norm_slope > STRONG_THRESHOLD else ('↗️', 'green', 'Slight Upward')
+    return ('⬇️', 'red', 'Downward') if norm_slope < -STRONG_THRESHOLD else ('↘️', 'red', 'Slight Downward')
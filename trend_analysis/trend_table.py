@@ -0,0 +1,69 @@
+# trend_table.py
+import numpy as np
+import pandas as pd
+
+from trend_engine import normalised_slope, describe_trend
+
+
+def build_window_table(products, fit, lo, hi):
+    """
+    One row per product with every metric /analysis/summary and /analysis/detail return,
+    already rounded the way the API serialises them, plus the fitted line and row range.
+    """
+    norm_slopes = normalised_slope(fit["slope"], fit["avg"])
+    described = [
+        describe_trend(float(v)) if ok else ('', '', 'Insufficient Data')
+        for v, ok in zip(norm_slopes, fit["valid"])
+    ]
+    n = fit["n"]
+    table = pd.DataFrame({
+        "n": n,
+        "valid": fit["valid"],
+        "total_sales": fit["total"].astype(np.int64),
+        "avg_sales": [round(float(v), 1) for v in fit["avg"]],
+        "trend_percent": [round(float(v), 1) if ok else 0.0 for v, ok in zip(norm_slopes, fit["valid"])],
+        "trend_description": [d[2] for d in described],
+        "trend_icon": [d[0] for d in described],
+        "color": [d[1] for d in described],
+        "r_squared": [round(float(v), 2) for v in fit["r_squared"]],
+        "slope": fit["slope"],
+        "intercept": fit["intercept"],
+        "trendline_start": np.where(fit["valid"], fit["intercept"], np.nan),
+        "trendline_end": np.where(fit["valid"], fit["intercept"] + fit["slope"] * (n - 1), np.nan),
+        "row_lo": lo,
+        "row_hi": hi
+    }, index=pd.Index(products, name="product"))
+    return table
+
+
+class TrendTable:
+    """
+    Materialised trend metrics for every product and every window of one source.
+
+    Built from TrendAccumulators whenever the source (re)loads, so request handlers only
+    look rows up. `ranked[window]` holds the valid products ordered the way the summary
+    lists them: by trend_percent descending, ties by product name.
+    """
+
+    def __init__(self, accumulators):
+        self.index = accumulators.index
+        self.reference_date = accumulators.reference_date
+        self.windows = {}
+        self.ranked = {}
+        for key in accumulators.windows_spec:
+            lo, hi = accumulators.bounds(key)
+            table = build_window_table(self.index.products, accumulators.metrics(key), lo, hi)
+            self.windows[key] = table
+            self.ranked[key] = table[table["valid"]].sort_values("trend_percent", ascending=False, kind="mergesort")
+
+    def lookup(self, window, product):
+        table = self.windows[window]
+        if product not in table.index:
+            return None
+        return table.loc[product]
+
+    def trendline(self, row):
+        if not row["valid"]:
+            return []
+        x = np.arange(int(row["n"]))
+        return (row["slope"] * x + row["intercept"]).tolist()